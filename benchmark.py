@@ -0,0 +1,54 @@
+# This file is used for benchmark purpose
+# It's not part of the docs
+from bindings import SDTBindings, clear_layers_cache
+import sys
+import time
+import tracemalloc
+
+##
+#	Load every binding of the corpus and keep them alive, then print
+#	how much memory is retained (and peak) with tracemalloc
+#	mode is "normal" or a "+" separated list of options (e.g. "slim+intern")
+def memory(mode):
+	options = {option : True for option in mode.split("+") if option != "normal"}
+
+	# Layers and types are shared in a process, start each mode from scratch
+	clear_layers_cache()
+	tracemalloc.start()
+	start = time.perf_counter()
+
+	mySDTBindings = SDTBindings(verbose = 0, **options)
+	bindings = [mySDTBindings.get_binding(compat) for compat in mySDTBindings._compat_dict]
+
+	elapsed = time.perf_counter() - start
+	current, peak = tracemalloc.get_traced_memory()
+	tracemalloc.stop()
+
+	print("%-12s %6d bindings  %8.2f MiB retained  %8.2f MiB peak  %6.2f s"
+		% (mode, len(bindings), current / 2**20, peak / 2**20, elapsed))
+
+	coverage = mySDTBindings.type_coverage()
+	print("%-12s %d/%d properties with unknown type" % ("", coverage.unknown, coverage.total))
+
+	if mySDTBindings.intern_info():
+		print("%-12s %s" % ("", mySDTBindings.intern_info()))
+
+##
+#	Print the count most expensive bindings sorted on key (see BindingsProfile.top())
+#	and write every BindingCost in profile.json
+def profile(count = 20, key = "time"):
+	mySDTBindings = SDTBindings(verbose = 0)
+	costs = mySDTBindings.profile()
+
+	print(costs.table(count, key))
+	costs.to_json("profile.json")
+
+if __name__ == "__main__":
+	if sys.argv[1:2] == ["profile"]:
+		profile(int(sys.argv[2]) if len(sys.argv) > 2 else 20, *sys.argv[3:4])
+		sys.exit()
+
+	modes = sys.argv[1:] or ["normal", "slim", "intern", "slim+intern"]
+
+	for mode in modes:
+		memory(mode)
@@ -8,14 +8,55 @@
 import os, sys
 import yaml
 import re
-
+import asyncio
+import bisect
+import shutil
+import urllib.error
+import urllib.parse
+import urllib.request
+import copy
+import hashlib
+import importlib.util
+import io
+import itertools
+import zipfile
+import json
+import multiprocessing
+import time
+
+from html.parser import HTMLParser
 from typing import NamedTuple, Any
+from collections import OrderedDict
+from collections.abc import MutableMapping
 
 ##
 #	@var		dtschema
 #	@brief		Path to dtschema python library in order to access schemas
 dtschema = "./download/dtschema"
 
+##
+#	@var		dtschema_zip
+#	@brief		Path of dt-schema zip archive, downloaded if there is no other
+#			dtschema source (see _get_schema_source())
+dtschema_zip = "./download/dt-schema-main.zip"
+
+##
+#	@var		dtschema_url
+#	@brief		dt-schema zip archive on github.com
+dtschema_url = "https://github.com/devicetree-org/dt-schema/archive/refs/heads/main.zip"
+
+##
+#	@var		schema_source
+#	@brief		DirSchemaSource or ZipSchemaSource giving access to files
+#			under #dtschema, see set_schema_source()
+schema_source = None
+
+##
+#	@var		bindings_url
+#	@brief		kernel.org devicetree bindings, mirrored by sync_mirror() if
+#			there is no local bindings
+bindings_url = "https://www.kernel.org/doc/Documentation/devicetree/bindings/"
+
 ##
 #	@var		nodes_types
 #	@brief		This dict is used to store node type information for
@@ -84,13 +125,24 @@ dtschema_types = {	"flag"				: "bool",
 #
 #		print(myBinding.required())
 #	~~~~~~~~~~~~~~~~~~~~~
+#	path can also be a list of rootdir (e.g. upstream bindings then vendor
+#	overlays), see BindingsLayer.
 class SDTBindings:
-	def __init__(self,path = "./download/bindings", verbose = 0,test = False):
+	def __init__(self,path = "./download/bindings", verbose = 0,test = False, slim = False,
+		     cache_size = 0, cache_bytes = 0, intern = False, schemas = None):
 		##
 		#	@var		_path
 		#	@brief		Internal reference to rootdir of bindings
 		self._path 		= path
 		##
+		#	@var		_roots
+		#	@brief		List of rootdir of bindings, last one has precedence
+		self._roots		= [path] if isinstance(path, str) else list(path)
+		##
+		#	@var		_layers
+		#	@brief		List of BindingsLayer, one for each of #_roots
+		self._layers		= list()
+		##
 		#	@var		_verbose
 		#	@brief		Internal reference for printing debug level (0 to 3)
 		self._verbose 		= verbose
@@ -103,37 +155,82 @@ class SDTBindings:
 		#	@var		_compat_dict
 		#	@brief		Internal reference similar to #_files_dict but keys are 'compatible'
 		self._compat_dict	= dict()
+		##
+		#	@var		_mtime_dict
+		#	@brief		Internal dict where key are path of YAML files and value
+		#			their last modification time, gathered while walking #_path
+		self._mtime_dict	= dict()
+		##
+		#	@var		_claims
+		#	@brief		Internal dict where key are 'compatible' and value a list of
+		#			#_files_dict keys claiming it, resolved by _resolve_compat()
+		self._claims		= dict()
+		##
+		#	@var		_conflicts
+		#	@brief		Internal dict where key are 'compatible' claimed by several
+		#			files and value a CompatConflict (see get_conflicts())
+		self._conflicts		= dict()
+		##
+		#	@var		_compat_index
+		#	@brief		Internal CompatIndex over #_compat_dict keys, built on first
+		#			search and reset each time #_compat_dict is resolved
+		self._compat_index	= None
+		##
+		#	@var		_slim
+		#	@brief		If True, Binding drop raw YAML, examples and descriptions
+		#			once extracted and share their $ref parents (see Binding)
+		self._slim		= slim
+		##
+		#	@var		_refs_cache
+		#	@brief		Internal dict where key are path of $ref bindings and
+		#			value the Binding shared by all children (slim mode only)
+		self._refs_cache	= dict() if slim else None
+		##
+		#	@var		_interner
+		#	@brief		Internal PropInterner shared by all Binding so identical
+		#			Prop are stored once, None if intern is False
+		self._interner		= PropInterner() if intern else None
+		##
+		#	@var		_cache
+		#	@brief		Internal BindingCache of get_binding() results, None if
+		#			both cache_size and cache_bytes are 0
+		self._cache		= BindingCache(cache_size, cache_bytes) if cache_size or cache_bytes else None
+		##
+		#	@var		_validators
+		#	@brief		Internal ValidatorCache, built on first validation
+		self._validators	= None
+		##
+		#	@var		_shared
+		#		Internal (sizes, dict) cache of _shared_ids(), rebuilt when
+		#		#_refs_cache or #_interner grow
+		self._shared		= None
 
 		# Download kernel.org dtbindings
-		if not os.path.exists(self._path):
+		if not os.path.exists(self._roots[0]):
 			print("No local bindings found, downloading them from kernel.org")
-			print("This may take up to 5 minutes...")
-			if self._verbose:
-				os.system("wget -r -A *.yaml --no-parent --cut-dirs=3 -nH -P download https://www.kernel.org/doc/Documentation/devicetree/bindings/")
+			print("This may take a few minutes...")
+			stats = sync_mirror(bindings_url, self._roots[0], verbose = self._verbose)
+			if stats.failed:
+				print("[ERR ]: %d downloads failed, run again to resume" % stats.failed)
 			else:
-				os.system("wget -r -A *.yaml --no-parent --cut-dirs=3 -nH -P download -q https://www.kernel.org/doc/Documentation/devicetree/bindings/")
-			print("Bindings download done !")
+				print("Bindings download done !")
 
 		# Download devicetree.org dtschema
-		if not os.path.exists(dtschema):
+		if schemas:
+			set_schema_source(schemas)
+		elif _get_schema_source() is None:
 			print("No local dtschema found, downloading them from github.com/devicetree-org/dt-schema")
 			print("This may take up to a minute...")
 
-			os.system("wget -P download/tmp -q https://github.com/devicetree-org/dt-schema/archive/refs/heads/main.zip")
-			os.system("unzip download/tmp/main.zip -d download/tmp/ > download.log")
-			os.system("cp -r download/tmp/dt-schema-main/dtschema/ download >> download.log")
-			os.system("rm -r download/tmp >> download.log")
-			os.system("rm download/dtschema/*.py >> download.log")
-			os.system("rm download/dtschema/.gitignore >> download.log")
-
-			print("Dt-schema download done !")
-
+			try:
+				_download(dtschema_url, dtschema_zip)
+			except (urllib.error.URLError, OSError) as error:
+				print("[ERR ]: Cannot download dt-schema: %s" % error)
+				print("	Types given by dt-schema will be unknown, run again to retry")
+			else:
+				set_schema_source(dtschema_zip)
+				print("Dt-schema download done !")
 
-		for dirpath, _, filenames in os.walk(self._path):
-			if dirpath != self._path:
-				for file in filenames:
-					if ".yaml" in file:
-						self._files_dict.update({file.split('.')[0] : dirpath + "/" + file})
 
 		_init_dtschema_list(verbose)
 
@@ -142,13 +239,27 @@ class SDTBindings:
 		if verbose > 2:
 			print("[INFO]: Initializing compatible dict...")
 
-		for key in self._files_dict:
-			tmp = Binding(self._files_dict[key],self._files_dict,verbose)
-			tmp = tmp.get_prop_by_name("compatible")
-			if tmp:
-				self._compat_extractor(key,tmp.value)
-			else:
-				pass
+		# _get_layer() builds the layers below the top one, follow them
+		layer = _get_layer(self._roots, verbose)
+		while layer is not None:
+			self._layers.insert(0, layer)
+			layer = layer.below
+
+		self._files_dict = self._layers[-1].files_dict
+		for layer in self._layers:
+			self._mtime_dict.update(layer.mtimes)
+
+		# Claims of a layer override claims of layers below it, and claims
+		# of a file overridden by a file with the same name are dropped
+		for layer in reversed(self._layers):
+			for item, keys in layer.claims.items():
+				if item in self._claims:
+					continue
+				keys = [key for key in keys if self._files_dict[key] == layer.files[key] and _claim_allowed(item, key)]
+				if keys:
+					self._claims.update({item : keys})
+
+		self._resolve_compat()
 
 		if test:
 			file_t = open('test.txt','w')
@@ -169,114 +280,806 @@ class SDTBindings:
 			print("[INFO]: Compatible dict initialized !")
 
 	##
-	#	@fn		_compat_extractor(self, key, compat)
-	#	@brief		Extract compatible node from properties and
-	#			init a dict like #_files_dict to access path through compatible
-	#	@todo		Process compatible with "pattern"\n
-	#			Process "snps,dwmac"
-	def _compat_extractor(self, key, compat):
-		# TODO: ???
-		if key == 'snps,dwmac':
-			return
+	#	@fn		get_binding(self, compatible)
+	#	@brief		Init the Binding class corresponding to compatible param
+	#	@details	If a cache has been requested (see cache_size and cache_bytes),
+	#			a copy of the cached Binding is returned, so it can be modified
+	#			without altering the cache.
+	#	@param		compatible	The compatible you want the binding for
+	def get_binding(self, compatible):
+		try:
+			path = self._compat_dict[compatible]
+			if self._cache is None:
+				return Binding(path,self._files_dict,self._verbose,self._slim,self._refs_cache,self._interner)
+
+			binding = self._cache.get(path)
+			if binding is None:
+				binding = Binding(path,self._files_dict,self._verbose,self._slim,self._refs_cache,self._interner)
+				self._cache.put(path, binding, self._shared_ids())
+			return self._copy_binding(binding)
+		except KeyError:
+			if self._verbose and not compatible in self._compat_dict:
+				suggestions = self.suggest_compatible(compatible)
+				if suggestions:
+					print("[INFO]: <%s> not found, did you mean %s ?" % (compatible, ", ".join(suggestions)))
+			return None
 
-		if isinstance(compat, Prop):
-			if compat.name == 'const':
-				self._duplicate_checker(compat.value,key)
+	##
+	#	@fn		get_validator(self, compatible)
+	#	@brief		Return a compiled jsonschema validator for the binding of
+	#			compatible (or None), see ValidatorCache
+	def get_validator(self, compatible):
+		try:
+			return self._get_validators().validator(self._compat_dict[compatible])
+		except KeyError:
+			return None
 
-			elif compat.name == 'enum':
-				for item in compat.value:
-					self._duplicate_checker(item, key)
+	##
+	#	@fn		validate_nodes(self, nodes, workers = 0)
+	#	@brief		Validate devicetree nodes against their binding
+	#	@param		nodes	An iterable of (compatible, node dict)
+	#	@param		workers	If not 0, number of processes used to validate
+	#	@return		A list with, for each node, the list of errors messages
+	#			(empty if node is valid)
+	def validate_nodes(self, nodes, workers = 0):
+		validators = self._get_validators()
+		items = [(self._compat_dict.get(compat), compat, node) for compat, node in nodes]
+
+		if not workers:
+			return [_validate_node(validators, item) for item in items]
+
+		with multiprocessing.Pool(workers, _validate_init, (self._roots, _schema_path())) as pool:
+			return pool.map(_validate_worker, items, chunksize = 64)
 
-			elif compat.name in ('contains','items','oneOf','allOf','anyOf'):
-				self._compat_extractor(key,compat.value)
+	##
+	#	@fn		_get_validators(self)
+	#	@brief		Return #_validators, building it if needed and refreshing
+	#			it if bindings have been modified
+	def _get_validators(self):
+		if self._validators is None:
+			self._validators = ValidatorCache(self._roots)
+		self._validators.refresh()
+		return self._validators
 
-			elif compat.name == "pattern":
-				# TODO
-				pass
+	##
+	#	@fn		export(self, out = None, fmt = "ndjson", workers = 0)
+	#	@brief		Write every resolved binding as JSON, one record per binding file
+	#	@details	Bindings are loaded and written one at a time, so memory usage
+	#			doesn't grow with the corpus. See _export_record() for the
+	#			record format and load_export() to read it back.
+	#	@param		out	A path or a file object (stdout if None)
+	#	@param		fmt	"ndjson" (one record per line) or "json" (a list of records)
+	#	@param		workers	If not 0, number of processes used to load bindings
+	#	@return		Number of records written
+	def export(self, out = None, fmt = "ndjson", workers = 0):
+		files = dict()
+		for compat, path in self._compat_dict.items():
+			files.setdefault(path, list()).append(compat)
+
+		if isinstance(out, str):
+			with open(out, 'w') as file_t:
+				return self._export(file_t, fmt, workers, files)
+		return self._export(out or sys.stdout, fmt, workers, files)
 
-			else:
-				# Description and deprecated, ignore it
-				pass
+	##
+	#	@fn		_export(self, file_t, fmt, workers, files)
+	#	@brief		Called by export() once output file is opened
+	def _export(self, file_t, fmt, workers, files):
+		if workers:
+			pool = multiprocessing.Pool(workers, _export_init,
+				(self._files_dict, nodes_types, _types_tables(self._files_dict)[0], self._slim, _schema_path()))
+			records = pool.imap(_export_worker, files.items(), chunksize = 16)
 		else:
-			if type(compat) is str:
-				self._duplicate_checker(compat, key)
-			if type(compat) == list:
-				for item in compat:
-					self._compat_extractor(key, item)
+			pool = None
+			records = (json.dumps(_export_record(Binding(path,self._files_dict,self._verbose,self._slim,self._refs_cache,self._interner), path, compats), default = str)
+				   for path, compats in files.items())
+
+		count = 0
+		try:
+			if fmt == "json":
+				file_t.write("[\n")
+			for record in records:
+				if fmt == "json" and count:
+					file_t.write(",\n")
+				file_t.write(record)
+				if fmt != "json":
+					file_t.write("\n")
+				count += 1
+			if fmt == "json":
+				file_t.write("\n]\n")
+		finally:
+			if pool:
+				pool.terminate()
+		return count
+
 	##
-	#	@fn		get_binding(self, compatible)
-	#	@brief		Init the Binding class corresponding to compatible param
-	#	@param		compatible	The compatible you want the binding for
-	def get_binding(self, compatible):
+	#	@fn		profile(self, compatibles = None)
+	#	@brief		Measure the resolution cost of each binding file
+	#	@details	Each file is loaded once, with the slim/intern options of this
+	#			SDTBindings but without #_cache nor #_refs_cache, so the cost
+	#			of its whole $ref chain is measured. MainProp types are
+	#			resolved at init, so they are not part of the measured time.
+	#	@param		compatibles	List of compatible to profile (all if None)
+	#	@return		A BindingsProfile item
+	def profile(self, compatibles = None):
+		files = dict()
+		for compat in self._compat_dict if compatibles is None else compatibles:
+			if compat in self._compat_dict:
+				files.setdefault(self._compat_dict[compat], list()).append(compat)
+
+		shared = {id(self._files_dict), id(self._interner)}
+		costs = list()
+		for path, compats in files.items():
+			start = time.perf_counter()
+			binding = Binding(path,self._files_dict,self._verbose,self._slim,None,self._interner)
+			elapsed = time.perf_counter() - start
+
+			depth, refs = _ref_stats(binding)
+			props, regexes = _prop_stats(binding._props._props.values())
+			costs.append(BindingCost(path, tuple(compats), elapsed, depth, len(binding._refs),
+						 refs, props, regexes, _approx_size(binding, set(shared))))
+
+		return BindingsProfile(costs)
+
+	##
+	#	@fn		type_coverage(self)
+	#	@brief		Statistics of resolved MainProp types of all bindings files
+	#	@return		A TypeCoverage item
+	def type_coverage(self):
+		paths = {os.path.normpath(path) for path in self._files_dict.values()}
+		types = dict()
+		for (path, _), type_t in _types_tables(self._files_dict)[0].items():
+			if path in paths:
+				types.update({type_t : types.get(type_t, 0) + 1})
+
+		return TypeCoverage(sum(types.values()), types.get('unknown', 0), types)
+
+	##
+	#	@fn		intern_info(self)
+	#	@brief		Statistics of Prop sharing (see intern param)
+	#	@return		An InternInfo item, or None if intern is False
+	def intern_info(self):
+		if self._interner is None:
+			return None
+		return self._interner.info()
+
+	##
+	#	@fn		cache_info(self)
+	#	@brief		Statistics of the get_binding() cache
+	#	@return		A CacheInfo item, or None if there is no cache
+	def cache_info(self):
+		if self._cache is None:
+			return None
+		return self._cache.info()
+
+	##
+	#	@fn		cache_clear(self, compatible = None)
+	#	@brief		Invalidate the cached Binding of compatible, or the whole
+	#			cache if compatible is None
+	def cache_clear(self, compatible = None):
+		if self._cache is None:
+			return
+		if compatible is None:
+			self._cache.invalidate()
+		elif compatible in self._compat_dict:
+			self._cache.invalidate(self._compat_dict[compatible])
+
+	##
+	#	@fn		_shared_ids(self)
+	#	@brief		ids of objects shared by all Binding of this SDTBindings,
+	#			they are neither copied nor counted in the cache size
+	def _shared_ids(self):
+		sizes = (len(self._refs_cache) if self._refs_cache is not None else 0,
+			 len(self._interner._table) if self._interner is not None else 0)
+		if self._shared is not None and self._shared[0] == sizes:
+			# deepcopy() adds its copies to the memo, give it a new dict
+			return dict(self._shared[1])
+
+		shared = {id(self._files_dict) : self._files_dict}
+		if self._interner is not None:
+			shared.update({id(self._interner) : self._interner})
+			shared.update({id(prop) : prop for prop in self._interner._table.values()})
+		if self._refs_cache is not None:
+			shared.update({id(self._refs_cache) : self._refs_cache})
+			for binding in self._refs_cache.values():
+				shared.update({id(binding) : binding})
+				# Children reach parents props through BindingProps._parents
+				# and LayeredProps._parents, not only through Binding._refs
+				shared.update({id(binding._props) : binding._props})
+				shared.update({id(binding._props._props) : binding._props._props})
+		self._shared = (sizes, shared)
+		return dict(shared)
+
+	##
+	#	@fn		_copy_binding(self, binding)
+	#	@brief		Deep copy a cached Binding without copying shared objects
+	def _copy_binding(self, binding):
+		return copy.deepcopy(binding, self._shared_ids())
+
+	##
+	#	@fn		search_compatible(self, prefix, limit = None)
+	#	@brief		Return all known compatible starting with prefix
+	#	@param		prefix	e.g. "st,stm32mp1"
+	#	@param		limit	Maximum number of results (all if None)
+	#	@return		A list of compatible sorted alphabetically
+	def search_compatible(self, prefix, limit = None):
+		return self._get_compat_index().complete(prefix, limit)
+
+	##
+	#	@fn		suggest_compatible(self, compatible, max_distance = 2, limit = 5)
+	#	@brief		"Did you mean" for a compatible that is not in #_compat_dict
+	#	@param		compatible	The (misspelled) compatible
+	#	@param		max_distance	Maximum edit distance of suggestions
+	#	@param		limit		Maximum number of results
+	#	@return		A list of compatible, closest first
+	def suggest_compatible(self, compatible, max_distance = 2, limit = 5):
+		return self._get_compat_index().suggest(compatible, max_distance, limit)
+
+	##
+	#	@fn		_get_compat_index(self)
+	#	@brief		Return #_compat_index, building it if needed
+	def _get_compat_index(self):
+		if self._compat_index is None:
+			self._compat_index = CompatIndex(self._compat_dict)
+		return self._compat_index
+
+	##
+	#	@fn		get_conflicts(self, compatible = None)
+	#	@brief		Report of 'compatible' claimed by several files
+	#	@param		compatible	If given, only return the conflict for it
+	#	@return		A list of CompatConflict, or a CompatConflict (or None)
+	#			if compatible is given
+	def get_conflicts(self, compatible = None):
+		if compatible is None:
+			return list(self._conflicts.values())
+		return self._conflicts.get(compatible)
+
+	##
+	#	@fn		_resolve_compat(self)
+	#	@brief		Init #_compat_dict and #_conflicts from #_claims
+	#			(see BindingsLayer)
+	#	@details	This is done in a single pass once every file has been
+	#			processed, so the result doesn't depend on files order.\n
+	#			Among allowed claims (see bindings._claim_allowed()), the kept file is:
+	#				- The one whose name match the compatible (e.g. gpio-keys.yaml
+	#				  for gpio-keys, then leds-pwm.yaml for pwm-leds), newest first\n
+	#				- For vendor compatible (e.g. st,stm32-uart), the newest one\n
+	#				- Else, the first path in alphabetical order
+	def _resolve_compat(self):
+		self._compat_dict.clear()
+		self._conflicts.clear()
+		self._compat_index = None
+
+		for item in sorted(self._claims):
+			keys = [key for key in self._claims[item] if _claim_allowed(item, key)]
+			if not keys:
+				continue
+
+			keys.sort(key = lambda key: self._claim_rank(item, key))
+			self._compat_dict.update({item : self._files_dict[keys[0]]})
+
+			if len(keys) > 1:
+				self._conflicts.update({item : CompatConflict(item,
+					self._files_dict[keys[0]],
+					[self._files_dict[key] for key in keys[1:]],
+					self._claim_reason(item, keys[0]))})
+
+		if self._verbose and self._conflicts:
+			print("[WARN]: %d compatible claimed by several files, see get_conflicts()" % len(self._conflicts))
+
+	##
+	#	@fn		_claim_rank(self, item, key)
+	#	@brief		Sort key used by _resolve_compat(), lower is better
+	def _claim_rank(self, item, key):
+		path = self._files_dict[key]
+		return _claim_rank(item, key, path, self._mtime_dict.get(path, 0))
+
+	##
+	#	@fn		_claim_reason(self, item, key)
+	#	@brief		Explain why key has been kept by _resolve_compat()
+	def _claim_reason(self, item, key):
+		if item in key or key in item or set(item.split('-')) & set(key.split('-')):
+			return "name"
+		elif ',' in item:
+			return "mtime"
+		return "path"
+
+##
+#	@class 		CompatConflict
+#	@brief		This NamedTuple represent a compatible claimed by several files
+#	@details	As NamedTuple var can't be detected by doxygen, here it's how it work:\n
+#			CompatConflict is like a C struct, with 4 field:\n
+#				* CompatConflict.compatible 	-> The conflicting compatible\n
+#				* CompatConflict.kept 		-> Path of the file kept in SDTBindings._compat_dict\n
+#				* CompatConflict.dropped	-> List of paths of the other files\n
+#				* CompatConflict.reason		-> Why kept has been chosen ("name", "mtime" or "path")
+class CompatConflict(NamedTuple):
+	compatible: str
+	kept: str
+	dropped: list
+	reason: str
+
+##
+#	@class 		TypeCoverage
+#	@brief		This NamedTuple is returned by SDTBindings.type_coverage()
+#	@details	As NamedTuple var can't be detected by doxygen, here it's how it work:\n
+#			TypeCoverage is like a C struct, with 3 field:\n
+#				* TypeCoverage.total 	-> Number of properties\n
+#				* TypeCoverage.unknown 	-> Number of properties whose type is 'unknown'\n
+#				* TypeCoverage.types	-> Dict where key are types and value number of properties
+class TypeCoverage(NamedTuple):
+	total: int
+	unknown: int
+	types: dict
+
+##
+#	@class 		CacheInfo
+#	@brief		This NamedTuple represent BindingCache statistics
+#	@details	As NamedTuple var can't be detected by doxygen, here it's how it work:\n
+#			CacheInfo is like a C struct, with 5 field:\n
+#				* CacheInfo.hits 	-> Number of get() that found an item\n
+#				* CacheInfo.misses 	-> Number of get() that didn't\n
+#				* CacheInfo.evictions	-> Number of items dropped to respect limits\n
+#				* CacheInfo.size	-> Number of items currently cached\n
+#				* CacheInfo.bytes	-> Approximate size in bytes of cached items
+class CacheInfo(NamedTuple):
+	hits: int
+	misses: int
+	evictions: int
+	size: int
+	bytes: int
+
+##
+#	@class		BindingCache
+#	@brief		A least recently used cache of Binding, bounded by a number of
+#			items and/or an approximate size in bytes
+#	@details	A limit set to 0 is not applied.
+class BindingCache:
+	def __init__(self, max_size = 0, max_bytes = 0):
+		##
+		#	@var	_max_size
+		#		Maximum number of items (0 for no limit)
+		self._max_size	= max_size
+		##
+		#	@var	_max_bytes
+		#		Maximum approximate size in bytes (0 for no limit)
+		self._max_bytes	= max_bytes
+		##
+		#	@var	_items
+		#		OrderedDict where key are cache key and value (item, size),
+		#		least recently used first
+		self._items	= OrderedDict()
+		##
+		#	@var	_bytes
+		#		Approximate size in bytes of all items
+		self._bytes	= 0
+		self._hits	= 0
+		self._misses	= 0
+		self._evictions	= 0
+
+	##
+	#	@fn		get(self, key)
+	#	@brief		Return cached item for key (or None) and mark it as recently used
+	def get(self, key):
 		try:
-			return Binding(self._compat_dict[compatible],self._files_dict,self._verbose)
+			item = self._items[key][0]
 		except KeyError:
+			self._misses += 1
 			return None
+		self._items.move_to_end(key)
+		self._hits += 1
+		return item
 
 	##
-	#	@fn		_duplicate_checker(self, item, key)
-	#	@brief		Used by _compat_extractor() in order to check if compatible
-	#			have duplicate
-	def _duplicate_checker(self, item, key):
-		try:
-			# Check if already exist in the list and if path are diff
-			if self._compat_dict[item] != self._files_dict[key]:
-				# Check last modif to choose which one we keep
-				if not item in key and not key in item:
-					if ',' in item:
-						if os.stat(self._compat_dict[item]).st_mtime > os.stat(self._files_dict[key]).st_mtime:
-							if self._verbose:
-								print("[WARN]: Not added '" + item + "' in " + self._files_dict[key])
-								print("[WARN]: Item already exist in " + self._compat_dict[item])
-							return
-					else:
-						if self._verbose:
-							print("[WARN]: Not added '" + item + "' in " + self._files_dict[key])
-							print("[WARN]: Item already exist in " + self._compat_dict[item])
-							print("[INFO]: Existing item might be wrong and will be replace later...")
-						return
-		except KeyError:
-			pass
+	#	@fn		put(self, key, item, shared = None)
+	#	@brief		Add item to the cache, then evict least recently used items
+	#			until limits are respected
+	#	@param		shared	A dict of objects (by id) not counted in item size
+	def put(self, key, item, shared = None):
+		self.invalidate(key)
+		size = _approx_size(item, set(shared or ()))
+		self._items[key] = (item, size)
+		self._bytes += size
+
+		while self._items and ((self._max_size and len(self._items) > self._max_size) or
+				       (self._max_bytes and self._bytes > self._max_bytes)):
+			_, (_, size) = self._items.popitem(last = False)
+			self._bytes -= size
+			self._evictions += 1
 
-		if not ',' in item:
-			# Avoid process compat outside of it base binding
-			if not item in key and not key in item:
-				# Some compat like pwm-leds or gpio-leds are stored in
-				# a file name that is reversed
-				# e.g. pwm-leds is part of leds-pwm.yaml)
-				if '-' in item:
-					if not "-" in key and item.split("-")[1] == key:
-						# Add to the list
-						self._compat_dict.update({item : self._files_dict[key]})
-					elif any(x in key.split("-") for x in item.split("-")):
-						# Add to the list
-						# simple-bus is a schema and can be added to this list
-						# by fsl,spba-bus.yaml but, it shouldn't be in this list
-						# since this list doesn't contains schemas
-						if not item == "simple-bus":
-							self._compat_dict.update({item : self._files_dict[key]})
-					elif key == "opp-v2": # The only one exception
-						# Add to the list
-						self._compat_dict.update({item : self._files_dict[key]})
-					else:
-						# simple-mfd had no yaml
-						if not item == "simple-mfd":
-							self._compat_dict.update({item : self._files_dict[key]})
-				else:
-					# Add to the list
-					self._compat_dict.update({item : self._files_dict[key]})
-			else:
-				# Add to the list
-				self._compat_dict.update({item : self._files_dict[key]})
+	##
+	#	@fn		invalidate(self, key = None)
+	#	@brief		Drop item for key, or every item if key is None
+	def invalidate(self, key = None):
+		if key is None:
+			self._items.clear()
+			self._bytes = 0
+		elif key in self._items:
+			self._bytes -= self._items.pop(key)[1]
+
+	##
+	#	@fn		info(self)
+	#	@brief		Return a CacheInfo
+	def info(self):
+		return CacheInfo(self._hits, self._misses, self._evictions, len(self._items), self._bytes)
+
+##
+#	@fn		_approx_size(obj, seen)
+#	@brief		Approximate size in bytes of obj and everything it references
+#	@param		seen	A set of ids already counted (or to be ignored)
+def _approx_size(obj, seen):
+	size = 0
+	stack = [obj]
+	while stack:
+		obj = stack.pop()
+		if id(obj) in seen:
+			continue
+		seen.add(id(obj))
+		size += sys.getsizeof(obj)
+
+		if isinstance(obj, dict):
+			stack.extend(obj.keys())
+			stack.extend(obj.values())
+		elif isinstance(obj, (list, tuple, set)):
+			stack.extend(obj)
+		elif hasattr(obj, '__dict__'):
+			stack.append(obj.__dict__)
+	return size
+
+##
+#	@class		CompatIndex
+#	@brief		Search index over compatible strings
+#	@details	Completion is a bisect in the sorted list of compatible.\n
+#			Suggestions use a partition index: each compatible is split in
+#			max_distance + 2 segments, and as d edits can change at most d
+#			of them, a compatible within d edits of a word has at least
+#			two segments found unchanged in the word, at most d chars away
+#			from their position. Segments are indexed by (compatible
+#			length, segment number, segment), so only compatibles sharing
+#			two segments with the word are compared with it (see
+#			_edit_distance()).
+class CompatIndex:
+	def __init__(self, compatibles = (), max_distance = 2):
+		##
+		#	@var	_sorted
+		#		Sorted list of compatible in the index
+		self._sorted	= sorted(set(compatibles))
+		##
+		#	@var	_max_distance
+		#		Maximum distance of suggest() using #_segments, above it
+		#		every compatible is compared
+		self._max_distance = max_distance
+		##
+		#	@var	_parts
+		#		Number of segments of each compatible
+		self._parts	= max_distance + 2
+		##
+		#	@var	_segments
+		#		Dict where key are (compatible length, segment number,
+		#		segment) and value a list of compatible
+		self._segments	= dict()
+		##
+		#	@var	_short
+		#		Dict where key are length and value a list of compatible
+		#		too short to be split in #_parts segments
+		self._short	= dict()
+
+		for compat in self._sorted:
+			self._index(compat)
+
+	def __len__(self):
+		return len(self._sorted)
+
+	def __contains__(self, compatible):
+		index = bisect.bisect_left(self._sorted, compatible)
+		return index < len(self._sorted) and self._sorted[index] == compatible
+
+	##
+	#	@fn		add(self, compatible)
+	#	@brief		Add a compatible to the index
+	def add(self, compatible):
+		if not compatible in self:
+			bisect.insort(self._sorted, compatible)
+			self._index(compatible)
+
+	##
+	#	@fn		complete(self, prefix, limit = None)
+	#	@brief		Return compatible starting with prefix, sorted alphabetically
+	def complete(self, prefix, limit = None):
+		ret = list()
+		for index in range(bisect.bisect_left(self._sorted, prefix), len(self._sorted)):
+			if not self._sorted[index].startswith(prefix) or (limit and len(ret) >= limit):
+				break
+			ret.append(self._sorted[index])
+		return ret
+
+	##
+	#	@fn		suggest(self, word, max_distance = 2, limit = 5)
+	#	@brief		Return compatible within max_distance edits of word,
+	#			sorted by distance then alphabetically
+	def suggest(self, word, max_distance = 2, limit = 5):
+		if max_distance > self._max_distance:
+			candidates = self._sorted
 		else:
-			# Add to the list
-			self._compat_dict.update({item : self._files_dict[key]})
+			candidates = self._candidates(word, max_distance)
+
+		ret = list()
+		for compat in candidates:
+			distance = _edit_distance(word, compat, max_distance)
+			if distance <= max_distance:
+				ret.append((distance, compat))
+
+		ret.sort()
+		return [compat for _, compat in ret[:limit]]
+
+	##
+	#	@fn		_index(self, compatible)
+	#	@brief		Add compatible segments to #_segments
+	def _index(self, compatible):
+		size = len(compatible)
+		if size < self._parts:
+			self._short.setdefault(size, list()).append(compatible)
+			return
+		for index, (start, end) in enumerate(self._bounds(size)):
+			self._segments.setdefault((size, index, compatible[start:end]), list()).append(compatible)
+
+	##
+	#	@fn		_bounds(self, size)
+	#	@brief		Return (start, end) of each segment of a compatible of size chars
+	def _bounds(self, size):
+		return [(size * index // self._parts, size * (index + 1) // self._parts)
+			for index in range(self._parts)]
+
+	##
+	#	@fn		_candidates(self, word, max_distance)
+	#	@brief		Return compatible that may be within max_distance edits of word
+	def _candidates(self, word, max_distance):
+		ret = set()
+		# max_distance edits leave at least this number of segments unchanged
+		needed = self._parts - max_distance
+		for size in range(max(0, len(word) - max_distance), len(word) + max_distance + 1):
+			if size < self._parts:
+				ret.update(self._short.get(size, ()))
+				continue
+
+			# Compatible having each segment somewhere in word
+			found = list()
+			for index, (start, end) in enumerate(self._bounds(size)):
+				compats = set()
+				for shift in range(-max_distance, max_distance + 1):
+					if start + shift >= 0 and end + shift <= len(word):
+						compats.update(self._segments.get((size, index, word[start + shift:end + shift]), ()))
+				found.append(compats)
+			for combo in itertools.combinations(found, needed):
+				ret.update(set.intersection(*combo))
+		return ret
+
+##
+#	@var		_edits
+#	@brief		Chars used by an edit at one end of (word, other): substitution,
+#			deletion or insertion, see _edit_distance()
+_edits = ((1, 1), (1, 0), (0, 1))
+
+##
+#	@fn		_edit_distance(word, other, max_distance)
+#	@brief		Levenshtein distance between word and other, or max_distance + 1
+#			if it's above max_distance
+#	@details	Common prefix and suffix are skipped. Up to distance 2 the
+#			result is then given by a few string comparisons, above it only
+#			the band of columns in [i - max_distance, i + max_distance] of
+#			the Levenshtein matrix is computed
+def _edit_distance(word, other, max_distance):
+	if abs(len(word) - len(other)) > max_distance:
+		return max_distance + 1
+
+	# Common prefix and suffix don't change the distance
+	start = 0
+	while start < len(word) and start < len(other) and word[start] == other[start]:
+		start += 1
+	end = 0
+	while end < len(word) - start and end < len(other) - start and word[-1 - end] == other[-1 - end]:
+		end += 1
+	word = word[start:len(word) - end]
+	other = other[start:len(other) - end]
+
+	cap = max_distance + 1
+	if not word or not other:
+		return min(len(word) + len(other), cap)
+	if len(word) == 1 and len(other) == 1:
+		return min(1, cap)
+
+	if max_distance <= 2:
+		# First and last chars differ, so first and last columns of an
+		# alignment are edits: distance is 2 only if the rest is equal
+		for start_w, start_o in _edits:
+			for end_w, end_o in _edits:
+				if word[start_w:len(word) - end_w] == other[start_o:len(other) - end_o]:
+					return min(2, cap)
+		return cap
+
+	size = len(other) + 1
+	prev = [min(i, cap) for i in range(size)]
+	for i in range(1, len(word) + 1):
+		char = word[i - 1]
+		row = [cap] * size
+		row[0] = best = min(i, cap)
+		for j in range(max(1, i - max_distance), min(size, i + cap)):
+			# min() calls are the bottleneck here
+			value = prev[j - 1] + (other[j - 1] != char)
+			if prev[j] + 1 < value:
+				value = prev[j] + 1
+			if row[j - 1] + 1 < value:
+				value = row[j - 1] + 1
+			if value > cap:
+				value = cap
+			row[j] = value
+			if value < best:
+				best = value
+		if best > max_distance:
+			return cap
+		prev = row
+	return prev[-1]
+
+##
+#	@var		_layers_cache
+#	@brief		Dict where key are tuple of rootdir and value the BindingsLayer of
+#			the last rootdir, so layers are shared by all SDTBindings of a process
+_layers_cache = dict()
+
+##
+#	@fn		_get_layer(roots, verbose)
+#	@brief		Return the BindingsLayer of roots[-1] on top of roots[:-1],
+#			from #_layers_cache if it has already been built
+#	@details	A cached layer is built again if a file of its rootdir has been
+#			added, removed or modified (see BindingsLayer.stale()) or if a
+#			layer below it has been built again. A missing rootdir (e.g.
+#			failed download) is never cached.
+def _get_layer(roots, verbose):
+	key = tuple(os.path.abspath(root) for root in roots)
+	below = _get_layer(roots[:-1], verbose) if len(roots) > 1 else None
+
+	layer = _layers_cache.get(key)
+	if layer is not None:
+		if layer.below is below and not layer.stale():
+			return layer
+		if verbose > 2:
+			print("[INFO]: %s modified, loading it again" % roots[-1])
+		# Types resolved from previous files can't be trusted anymore
+		_drop_types(layer.files_dict)
+		_ref_docs.clear()
+
+	layer = BindingsLayer(roots[-1], below, verbose)
+	if os.path.isdir(roots[-1]):
+		_layers_cache.update({key : layer})
+	else:
+		_layers_cache.pop(key, None)
+	return layer
+
+##
+#	@fn		clear_layers_cache()
+#	@brief		Forget every BindingsLayer and resolved types, next SDTBindings
+#			will walk and parse its rootdir again (e.g. if files have been modified)
+def clear_layers_cache():
+	_layers_cache.clear()
+	_types_scopes.clear()
+	_ref_docs.clear()
+
+##
+#	@class		BindingsLayer
+#	@brief		Files and compatible claims of one bindings rootdir
+#	@details	A layer is built on top of the layers below it (e.g. vendor
+#			overlay on top of upstream bindings): a file with the same name
+#			overrides the one of the layer below and $ref are resolved in
+#			all layers.\n
+#			Layers are shared (see _get_layer()), so upstream bindings are
+#			walked and parsed once whatever overlays are used on top of it.
+class BindingsLayer:
+	def __init__(self, root, below, verbose):
+		##
+		#	@var	root
+		#		Rootdir of this layer
+		self.root	= root
+		##
+		#	@var	below
+		#		BindingsLayer below this one (or None)
+		self.below	= below
+		##
+		#	@var	files
+		#		Dict where key are filename without extension and value
+		#		path of YAML files of this layer only
+		self.files	= dict()
+		##
+		#	@var	duplicates
+		#		Dict where key are filename without extension found several
+		#		times in this layer and value the list of ignored paths
+		self.duplicates	= dict()
+		##
+		#	@var	mtimes
+		#		Dict where key are path of YAML files of this layer and
+		#		value their last modification time
+		self.mtimes	= dict()
+		##
+		#	@var	files_dict
+		#		Like #files but with layers below, see SDTBindings._files_dict
+		self.files_dict	= dict(below.files_dict) if below else dict()
+		##
+		#	@var	claims
+		#		Dict where key are 'compatible' and value a list of
+		#		#files keys claiming it
+		self.claims	= dict()
+
+		for name, path in _bindings_files(root):
+			if name in self.files:
+				# Files are walked in alphabetical order, keep the last one
+				self.duplicates.setdefault(name, list()).append(self.files[name])
+			self.files.update({name : path})
+			self.mtimes.update({path : os.stat(path).st_mtime})
+		self.files_dict.update(self.files)
+
+		if verbose and self.duplicates:
+			print("[WARN]: %d file names found several times in %s" % (len(self.duplicates), root))
+
+		# Bindings are only loaded to retrieve their compatible, use slim
+		# mode and share $ref between them
+		refs_cache = dict()
+		for key, path in self.files.items():
+			tmp = Binding(path,self.files_dict,verbose,True,refs_cache)
+			tmp = tmp.get_prop_by_name("compatible")
+			if tmp:
+				self._compat_extractor(key,tmp.value)
+
+	##
+	#	@fn		stale(self)
+	#	@brief		True if YAML files of #root differ from #mtimes (added,
+	#			removed or modified since this layer has been built)
+	def stale(self):
+		mtimes = dict()
+		for _, path in _bindings_files(self.root):
+			try:
+				mtimes.update({path : os.stat(path).st_mtime})
+			except OSError:
+				return True
+		return mtimes != self.mtimes
+
+	##
+	#	@fn		_compat_extractor(self, key, compat)
+	#	@brief		Extract compatible node from properties and
+	#			init #claims
+	#	@todo		Process compatible with "pattern"\n
+	#			Process "snps,dwmac"
+	def _compat_extractor(self, key, compat):
+		# TODO: ???
+		if key == 'snps,dwmac':
+			return
+
+		for item in _compat_items(compat):
+			self._add_claim(item, key)
+
+	##
+	#	@fn		_add_claim(self, item, key)
+	#	@brief		Used by _compat_extractor() to record that file key
+	#			claims the compatible item
+	#	@details	Claims are only resolved once all files have been
+	#			processed, see SDTBindings._resolve_compat()
+	def _add_claim(self, item, key):
+		try:
+			claims = self.claims[item]
+		except KeyError:
+			claims = list()
+			self.claims.update({item : claims})
+		if not key in claims:
+			claims.append(key)
 
 ##
 #	@class		Binding
 #	@brief		This class represent a binding document
+#	@details	In slim mode, #_content is released once extracted, examples and
+#			descriptions are not kept and $ref bindings are shared through
+#			refs_cache instead of being loaded again for each child.\n
+#			If an interner (PropInterner) is given, identical Prop are shared
+#			with other bindings.
 class Binding:
-	def __init__(self, path, files_dict,verbose):
+	def __init__(self, path, files_dict,verbose, slim = False, refs_cache = None, interner = None):
 		##
 		#	@var	_verbose
 		#		Internal reference for printing debug level (0 to 3)
@@ -290,12 +1093,24 @@ class Binding:
 		#		Internal reference on all YAML path in root dir. Given by SDTBindings
 		self._files_dict = files_dict
 		##
+		#	@var	_slim
+		#		If True, drop raw YAML, examples and descriptions after extraction
+		self._slim	= slim
+		##
+		#	@var	_refs_cache
+		#		Internal reference on $ref Binding shared between bindings (or None)
+		self._refs_cache = refs_cache
+		##
+		#	@var	_interner
+		#		Internal reference on PropInterner shared between bindings (or None)
+		self._interner	= interner
+		##
 		#	@var	_content
 		#		Internal pointer on loaded yaml
 		self._content	= None
 		##
 		#	@var	_file
-		#		Internal file pointer
+		#		Internal file pointer, closed and reset to None once loaded
 		self._file	 = None
 		##
 		#	@var	_refs
@@ -308,7 +1123,7 @@ class Binding:
 		##
 		#	@var	_props
 		#		Internal reference on BindingProps containing properties information
-		self._props 	= BindingProps(verbose)
+		self._props 	= BindingProps(verbose, slim, interner, os.path.normpath(path), files_dict)
 		##
 		#	@var	file_name
 		#		The YAML file name represented by this class
@@ -337,7 +1152,7 @@ class Binding:
 		global dtschema
 
 		try:
-			self._file = open(path, 'r')
+			self._file = _open(path)
 		except OSError:
 			if verbose:
 				print("[ERR ]: Cannot open", path)
@@ -345,7 +1160,9 @@ class Binding:
 				print("	For more information, please use debug lvl 3")
 			return None
 
-		self._content = yaml.safe_load(self._file)
+		with self._file:
+			self._content = yaml.safe_load(self._file)
+		self._file = None
 
 		# Loading basics information
 		self.id = self._content['$id'].replace('#','')
@@ -357,12 +1174,51 @@ class Binding:
 		self._init_allOf()
 		self._init_Properties()
 
+		if slim:
+			# Everything useful has been extracted, release raw YAML
+			self._content	= None
+			return
+
 		try:
 			self.examples = self._content['examples']
 		except KeyError:
 			if verbose > 2:
 				print("[INFO]: No examples found for ", self.file_name)
 
+	##
+	#	@fn		from_record(cls, record)
+	#	@brief		Create a Binding from a record of SDTBindings.export(),
+	#			without loading any YAML
+	@classmethod
+	def from_record(cls, record):
+		self = cls.__new__(cls)
+		self._verbose	= 0
+		self._path	= record["path"].rsplit('/',1)[0]
+		self._files_dict = dict()
+		self._slim	= True
+		self._refs_cache = None
+		self._interner	= None
+		self._content	= None
+		self._file	= None
+		self._refs	= list()
+		self._if	= list()
+		self._props	= BindingProps(0, True, None, record["path"])
+		self.file_name	= record["file_name"]
+		self.id		= record["id"]
+		self.schema	= record["schema"]
+		self.maintainers = record["maintainers"]
+		self.title	= record["title"]
+		self.examples	= str()
+
+		# Lists are already resolved, keep them as is
+		self._props._own_required = dict.fromkeys(record["required"])
+		self._props._own_optional = dict.fromkeys(record["optional"])
+		for key, prop in record["props"].items():
+			# Types of anyOf/oneOf are tuples, written as JSON lists
+			type_t = tuple(prop["t"]) if isinstance(prop["t"], list) else prop["t"]
+			self._props._props.update({key : MainProp(key, _import_value(prop["v"]), type_t)})
+		return self
+
 	##
 	#	@fn		_init_allOf(self)
 	#	@brief		Init #_refs
@@ -376,56 +1232,36 @@ class Binding:
 
 		for item in self._content['allOf']:
 			if '$ref' in item:
-				path = str()
-				# If ref pointing on a dt-schema, path used is defined
-				# at top of this script and point on path where pip3
-				# installed dt-schema
-				if "schemas/" in item['$ref']:
-					#TODO:  Instead of spliting on '#', we should be able
-					#       to handle the case where there node ref
-					#       after this '#'. (If it make sens)
-					path = dtschema + item['$ref'].split('#')[0]
-
-					# Relative path
-				elif "../" in item['$ref']:
-					path = self._path.rsplit('/',1)[0] + item['$ref'].replace('..','').replace('#','')
-				else:
-					# There is multiple common.yaml.
-					# Some of them have relative path and can be process
-					# with the above statement, other generally are
-					# stored in other dir
-					# e.g. root_dir/dir_a/subdir_a/myfile.yaml
-					#   _______________________________|
-					#  |-> root_dir/dir_b/common.yaml
-					if "/common.yaml" in item['$ref']:
-						path = self._path
-						# This loop is used to get back to root dir
-						while path.rsplit('/',1)[1] != "bindings":
-							path = path.rsplit('/',1)[0]
-						path += '/' + item['$ref'].split('#')[0]
-					# Finaly, normal ref
-					else:
-						#TODO:  Same as above
-						name = item['$ref'].split('#')[0].replace('.yaml','')
-
-						if '/' in name:
-							name = name.rsplit('/',1)[1]
-
-						try:
-							path = self._files_dict[name]
-						except KeyError:
-							path = None
-							if self._verbose:
-								print("[WARN]: <%s> not found for <%s>. Is path correct ?" % (item['$ref'].split('#')[0], self.file_name))
+				path = _ref_path(item['$ref'], self._path, self._files_dict)
+				if path is None and self._verbose:
+					print("[WARN]: <%s> not found for <%s>. Is path correct ?" % (item['$ref'].split('#')[0], self.file_name))
 
 				if path:
 					if self._verbose > 2:
 						print("[INFO]: Binding <%s> loading $ref <%s>" % (self._path + "/" + self.file_name, path))
-					self._refs.append(Binding(path,self._files_dict,self._verbose))
+					self._refs.append(self._load_ref(path))
 
 			if 'if' in item:
 				self._if.append(item)
 
+	##
+	#	@fn		_load_ref(self, path)
+	#	@brief		Load a $ref Binding, or retrieve it from #_refs_cache if
+	#			it has already been loaded by another binding
+	#	@param		path	Path of the $ref binding
+	#	@return		A Binding item
+	def _load_ref(self, path):
+		if self._refs_cache is None:
+			return Binding(path,self._files_dict,self._verbose,self._slim,None,self._interner)
+
+		path = os.path.normpath(path)
+		try:
+			return self._refs_cache[path]
+		except KeyError:
+			binding = Binding(path,self._files_dict,self._verbose,self._slim,self._refs_cache,self._interner)
+			self._refs_cache.update({path : binding})
+			return binding
+
 	##
 	#	@fn		_init_Properties(self)
 	#	@brief		Init #_props which is basically a BindingProps item
@@ -451,7 +1287,7 @@ class Binding:
 			if self._verbose:
 				print("[WARN]: No node 'properties' found for", self.file_name)
 			properties = False
-		self._props.add_properties(properties)
+		self._props.add_properties(properties, self._content)
 
 		# Extract patternProp node
 		try:
@@ -460,7 +1296,7 @@ class Binding:
 			if self._verbose > 1:
 				print("[WARN]: No node 'patternProperties' found for", self.file_name)
 			patternProp = False
-		self._props.add_properties(patternProp)
+		self._props.add_properties(patternProp, self._content)
 
 		# Add ref properties
 		for binding in self._refs:
@@ -654,86 +1490,251 @@ class MainProp(NamedTuple):
 			return None
 		return None
 
+##
+#	@class		LayeredProps
+#	@brief		A dict like view of properties where $ref parents are chained
+#			as layers instead of being copied
+#	@details	Writes only go to the own layer, so parents (that could be
+#			shared between several bindings) are never modified.\n
+#			Lookups search the own layer first, then each parent in the
+#			order they have been added. 'compatible' of parents is hidden
+#			as it belongs to the parent binding only.
+class LayeredProps(MutableMapping):
+	def __init__(self):
+		##
+		#	@var	_own
+		#		A dict containing properties of this layer only
+		self._own	= dict()
+		##
+		#	@var	_parents
+		#		A list of parents LayeredProps
+		self._parents	= list()
+
+	##
+	#	@fn		add_layer(self, layer)
+	#	@brief		Chain a parent LayeredProps behind all current layers
+	def add_layer(self, layer):
+		self._parents.append(layer)
+
+	def __getitem__(self, key):
+		try:
+			return self._own[key]
+		except KeyError:
+			pass
+		if key != 'compatible':
+			for layer in self._parents:
+				try:
+					return layer[key]
+				except KeyError:
+					pass
+		raise KeyError(key)
+
+	def __setitem__(self, key, value):
+		self._own[key] = value
+
+	def __delitem__(self, key):
+		del self._own[key]
+
+	def __contains__(self, key):
+		try:
+			self[key]
+		except KeyError:
+			return False
+		return True
+
+	def __iter__(self):
+		seen = set()
+		for key in self._own:
+			seen.add(key)
+			yield key
+		for layer in self._parents:
+			for key in layer:
+				if key != 'compatible' and not key in seen:
+					seen.add(key)
+					yield key
+
+	def __len__(self):
+		return sum(1 for _ in self)
+
+##
+#	@class 		InternInfo
+#	@brief		This NamedTuple represent PropInterner statistics
+#	@details	As NamedTuple var can't be detected by doxygen, here it's how it work:\n
+#			InternInfo is like a C struct, with 3 field:\n
+#				* InternInfo.unique 	-> Number of distinct Prop stored\n
+#				* InternInfo.shared 	-> Number of Prop replaced by an identical one\n
+#				* InternInfo.skipped	-> Number of Prop that couldn't be hashed
+class InternInfo(NamedTuple):
+	unique: int
+	shared: int
+	skipped: int
+
+##
+#	@class		PropInterner
+#	@brief		Store structurally identical Prop and MainProp once
+#	@details	Prop are interned bottom-up (children first), so a Prop is
+#			identified by its name and the id of its (already interned)
+#			children instead of walking its whole subtree.\n
+#			Interned Prop are shared: their value must not be modified.
+class PropInterner:
+	def __init__(self):
+		##
+		#	@var	_table
+		#		Dict where key are Prop structure and value the shared Prop
+		self._table	= dict()
+		self._shared	= 0
+		self._skipped	= 0
+
+	##
+	#	@fn		intern(self, prop)
+	#	@brief		Return the stored Prop identical to prop, or store prop
+	def intern(self, prop):
+		try:
+			key = (type(prop),) + tuple(_freeze(field) for field in prop)
+			ret = self._table.get(key)
+		except TypeError:
+			# Unhashable value, can't be shared
+			self._skipped += 1
+			return prop
+
+		if ret is None:
+			self._table[key] = prop
+			return prop
+		self._shared += 1
+		return ret
+
+	##
+	#	@fn		info(self)
+	#	@brief		Return an InternInfo
+	def info(self):
+		return InternInfo(len(self._table), self._shared, self._skipped)
+
+##
+#	@fn		_freeze(value)
+#	@brief		Return a hashable representation of a Prop value used by
+#			PropInterner, raise TypeError if there is none
+#	@details	Types are part of it, so 1, 1.0 and True are not merged
+def _freeze(value):
+	if isinstance(value, (Prop, MainProp)):
+		# Already interned (or unhashable, then it's kept alive by its
+		# parent in PropInterner._table so its id can't be reused)
+		return ('P', id(value))
+	elif isinstance(value, list):
+		return ('L',) + tuple(_freeze(item) for item in value)
+	elif isinstance(value, dict):
+		return ('D',) + tuple((key, _freeze(item)) for key, item in value.items())
+	hash(value)
+	return (type(value), value)
+
 ##
 #	@class		BindingProps
 #	@brief		This class represent the binding properties of a Binding class
+#	@details	Properties of $ref bindings are not copied, parents BindingProps
+#			are chained (see LayeredProps) and required/optional lists are
+#			resolved lazily from own and parents ordered sets.
 #	@todo		Different algorithm could be rework as they could be more
 #			clean and efficient since we had __contains__ and __getitem__ to MainProp
 class BindingProps:
-	def __init__(self, verbose):
+	def __init__(self, verbose, slim = False, interner = None, path = None, files_dict = None):
 		##
 		#	@var	_props
-		#		A dict Contains properties formatted with Prop
-		self._props	= dict()
+		#		A LayeredProps Contains properties formatted with Prop
+		self._props	= LayeredProps()
 		##
-		#	@var	_required
-		#		A list of all required properties
-		self._required 	= list()
+		#	@var	_own_required
+		#		An ordered set (dict keys) of required properties of this binding only
+		self._own_required = dict()
 		##
-		#	@var	_optional
-		#		A list of all optional properties
-		self._optional 	= list()
+		#	@var	_own_optional
+		#		An ordered set (dict keys) of properties of this binding only
+		self._own_optional = dict()
+		##
+		#	@var	_parents
+		#		A list of BindingProps added by add_from_BindingProp()
+		self._parents	= list()
+		##
+		#	@var	_cache
+		#		Resolved (required, optional) lists, None when outdated
+		self._cache	= None
 		##
 		#	@var	_verbose
 		#		Internal reference for printing debug level (0 to 3)
 		self._verbose 	= verbose
+		##
+		#	@var	_slim
+		#		If True, description nodes are not kept in #_props
+		self._slim	= slim
+		##
+		#	@var	_interner
+		#		PropInterner used to share identical Prop (or None)
+		self._interner	= interner
+		##
+		#	@var	_path
+		#		Path of the binding file, key of props types (or None)
+		self._path	= path
+		##
+		#	@var	_files_dict
+		#		See SDTBindings._files_dict, used to follow $ref for types
+		self._files_dict = files_dict if files_dict is not None else dict()
+
+	##
+	#	@fn		_required(self)
+	#	@brief		A list of all required properties, own ones (sorted) first
+	@property
+	def _required(self):
+		return self._resolve()[0]
+
+	##
+	#	@fn		_optional(self)
+	#	@brief		A list of all optional properties, own ones (sorted) first,
+	#			without the ones that can be found in #_required
+	@property
+	def _optional(self):
+		return self._resolve()[1]
 
 	##
 	#	@fn		add_required(self, required)
-	#	@brief		Init or update #_required
+	#	@brief		Init or update #_own_required
 	#	@param		required	A list usually extracted from \link Binding._content \endlink
 	def add_required(self, required):
 		if not required:
 			return
-		# Init or update required list
-		self._required += required
-		# Remove duplicates
-		self._required = list(dict.fromkeys(self._required))
-		self._required.sort()
-		self._update()
+		# Init or update required set
+		self._own_required.update(dict.fromkeys(required))
+		self._own_required = dict.fromkeys(sorted(self._own_required))
+		self._cache = None
 
 	##
-	#	@fn		add_properties(self, properties)
-	#	@brief		Init or update #_optional and _props
+	#	@fn		add_properties(self, properties, doc = None)
+	#	@brief		Init or update #_own_optional and _props
 	#	@param		properties	A dict usually extracted from \link Binding._content \endlink
-	def add_properties(self, properties):
+	#	@param		doc		The whole document properties come from, used
+	#					to resolve local $ref (e.g. "#/definitions/...")
+	def add_properties(self, properties, doc = None):
 		if not properties:
 			return
 
-		# Init or update optional list from properties
-		for key in properties:
-			self._optional.append(key)
-		self._optional.sort()
-		self._update()
+		# Init or update optional set from properties
+		self._own_optional.update(dict.fromkeys(properties))
+		self._own_optional = dict.fromkeys(sorted(self._own_optional))
+		self._cache = None
 
 		# Init or update props list from properties
 		for key,item in properties.items():
 			value = self._value_analyzer(item)
-			type_t = self._get_type(key, item)
-			self._props.update({key : MainProp(key,value,type_t)})
+			type_t = self._get_type(key, item, doc)
+			self._props.update({key : self._new_prop(MainProp, key, value, type_t)})
 
 	##
 	#	@fn		add_from_BindingProp(self, prop)
 	#	@brief		This function meant to be called to add properties of a
 	#			$ref binding to the main Binding
+	#	@details	prop is chained as a parent layer, nothing is copied and
+	#			prop is never modified.
 	def add_from_BindingProp(self, prop):
-		self._required += prop._required
-		# Remove duplicates
-		self._required = list(dict.fromkeys(self._required))
-
-		self._optional += prop._optional
-		# Remove duplicates
-		self._optional = list(dict.fromkeys(self._optional))
-		# Update
-
-		if 'compatible' in prop._props.keys():
-			del prop._props['compatible']
-
-		for k,v in prop._props.items():
-			if not k in self._props.keys():
-				self._props.update({k : v})
-
-		self._update()
+		self._parents.append(prop)
+		self._props.add_layer(prop._props)
+		self._cache = None
 
 	##
 	#	@fn		prop_from_name(self, name)
@@ -747,26 +1748,33 @@ class BindingProps:
 			# Check if there is any pattern in nodes matching the name
 			for key,value in self._props.items():
 				if re.search(key, name):
-					return self._props[key]
+					return value
 
 				elif type(value.value) == list:
 					for prop in value.value:
 						if isinstance(prop, Prop):
 							if prop.name == 'pattern':
 								if re.search(prop.value, name.split('@')[0]):
-									return self._props[key]
+									return value
 		# Else return nothing
 		return None
 
 	##
-	#	@fn		_update(self)
-	#	@brief		Did some cleaning on #_optional list after update
-	#	@details	After adding new elements to #_optional, check if these
-	#			elements can be found in #_required, and so, remove them
-	#			from #_optional
-	def _update(self):
-		if self._required:
-			self._optional = [item for item in self._optional if item not in self._required]
+	#	@fn		_resolve(self)
+	#	@brief		Build (and cache) required and optional lists from own
+	#			ordered sets followed by parents ones
+	#	@details	Optional properties that can be found in required ones
+	#			are removed from optional list.
+	def _resolve(self):
+		if self._cache is None:
+			required = dict(self._own_required)
+			optional = dict(self._own_optional)
+			for parent in self._parents:
+				required.update(dict.fromkeys(parent._required))
+				optional.update(dict.fromkeys(parent._optional))
+			self._cache = (list(required),
+				       [item for item in optional if not item in required])
+		return self._cache
 
 	##
 	#	@fn		_value_analyzer(self, item)
@@ -779,6 +1787,9 @@ class BindingProps:
 		# It should be only dict or simple values
 		if type(item) == dict:
 			for key, value in item.items():
+				# Descriptions are only human readable text
+				if self._slim and key == 'description':
+					continue
 				# If value type is dict
 				if type(value) == dict:
 					# Temporary list holding the value for the futur prop
@@ -791,7 +1802,7 @@ class BindingProps:
 					else:
 						tmp_val = tmp
 					# And create a new prop
-					ret.append(Prop(key, tmp_val))
+					ret.append(self._new_prop(Prop, key, tmp_val))
 				#If value type is list
 				elif type(value) == list:
 					# And the first elements is a dict
@@ -808,85 +1819,1647 @@ class BindingProps:
 							else:
 								tmp_val = tmp
 						# And create a new prop
-						ret.append(Prop(key,tmp_val))
+						ret.append(self._new_prop(Prop, key, tmp_val))
 					else:
 						# Simple values, no sub properties
-						ret.append(Prop(key,value))
+						ret.append(self._new_prop(Prop, key, value))
 				else:
 					# Simple values, no sub properties
-					ret.append(Prop(key,value))
+					ret.append(self._new_prop(Prop, key, value))
 			return ret
 		else:
 			# Simple values, no sub properties
 			return item
 
 	##
-	#	@fn		_get_type(self, key, item)
+	#	@fn		_new_prop(self, cls, *args)
+	#	@brief		Create a Prop (or MainProp) or retrieve the identical one
+	#			from #_interner
+	def _new_prop(self, cls, *args):
+		if self._interner is None:
+			return cls(*args)
+		# Property names may be non str YAML keys (e.g. 1: foo)
+		name = sys.intern(args[0]) if isinstance(args[0], str) else args[0]
+		return self._interner.intern(cls(name, *args[1:]))
+
+	##
+	#	@fn		_get_type(self, key, item, doc = None)
 	#	@brief		Called by add_properties() to retrieve MainProp type
-	#	@todo		All case not or partially process (see TODO:):
-	#				- Item dict with '$ref' that is not schema and no 'type'\n
-	#				- Item dict with '$ref' that's not part of bindings.dtschema_types dict\n
-	#				- Item that doesn't fit in any if else
-	def _get_type(self, key, item):
+	#	@details	Result is stored in props types of #_files_dict (see
+	#			_types_tables()), so a property type is only resolved once
+	#			for all Binding of a file
+	def _get_type(self, key, item, doc = None):
 		if key in nodes_types.keys():
 			return nodes_types[key]
-		else:
-			if isinstance(item, dict):
-				if '$ref' in item.keys():
-					# A type has been given by the vendor, nice job !
-					ref = item['$ref']
 
-					if '/schemas/' in ref:
-						try:
-							return dtschema_types[ref.rsplit('/',1)[1]]
-						except KeyError:
-							# TODO: Maybe ? idk if graph is usefull for TF-M ?
-							if self._verbose > 1:
-								print("[WARN]: Unknown type %s for %s, set it to unknown" % (ref.rsplit('/',1)[1],key))
-							return 'unknown'
+		if not self._path:
+			return self._resolve_type(key, item, doc)
+
+		props_types = _types_tables(self._files_dict)[0]
+		try:
+			return props_types[(self._path, key)]
+		except KeyError:
+			type_t = self._resolve_type(key, item, doc)
+			props_types.update({(self._path, key) : type_t})
+			return type_t
+
+	##
+	#	@fn		_resolve_type(self, key, item, doc = None)
+	#	@brief		Called by _get_type() to resolve MainProp type
+	#	@details	$ref are followed (see _ref_type()) when their type can't be
+	#			found in bindings.dtschema_types
+	#	@todo		All case not or partially process (see TODO:):
+	#				- Item that doesn't fit in any if else
+	def _resolve_type(self, key, item, doc = None):
+		if isinstance(item, dict):
+			if '$ref' in item.keys():
+				# A type has been given by the vendor, nice job !
+				ref = item['$ref']
+
+				if '/schemas/' in ref:
+					# types.yaml ones are given by dtschema_types (see _ref_type())
+					type_t = _ref_type(ref, self._path, self._files_dict, doc)
+					if type_t == 'unknown' and self._verbose > 1:
+						print("[WARN]: Unknown type %s for %s, set it to unknown" % (ref.rsplit('/',1)[1],key))
+					return type_t
+				else:
+					if not 'type' in item.keys():
+						# e.g. 'phy', 'phy-device' or 'mdio', follow the $ref
+						return _ref_type(ref, self._path, self._files_dict, doc)
 					else:
-						if not 'type' in item.keys():
-							# TODO: Here there is some 'phy', 'phy-device' or 'mdio'
-							# Idk what to do with that
-							return 'unknown'
-						else:
-							return item['type']
-
-				elif 'type' in item.keys():
-					# A type has been given by the vendor, nice job !
-					type_t = item['type']
-					if type_t == "object":
-						return "void *"
-					elif type_t == "boolean":
-						return "bool"
+						return item['type']
+
+			elif 'type' in item.keys():
+				# A type has been given by the vendor, nice job !
+				type_t = item['type']
+				if type_t == "object":
+					return "void *"
+				elif type_t == "boolean":
+					return "bool"
+				else:
+					# for what i know, there is no way we fall here
+					print("[WARN]: Unconventional type %s for %s" % (type_t,key))
+					return "unknown"
+			else:
+				# Type might be given by a $ref in allOf, oneOf or anyOf
+				type_t = _node_type(item, self._path, self._files_dict, doc)
+				if type_t != 'unknown':
+					return type_t
+
+				if not '#' in key:
+					# Usually give name of member for a given array
+					# e.g reg and reg-name work together
+					# We might use reg-name to name C var of all reg member
+					# beside of a single reg array
+					if "name" in key:
+						return "name"
 					else:
-						# for what i know, there is no way we fall here
-						print("[WARN]: Unconventional type %s for %s" % (type,key))
+						# Vendor should give a type for each nodes that not's
+						# part of dtschema, so rip.
 						return "unknown"
 				else:
-					if not '#' in key:
-						# Usually give name of member for a given array
-						# e.g reg and reg-name work together
-						# We might use reg-name to name C var of all reg member
-						# beside of a single reg array
-						if "name" in key:
-							return "name"
-						else:
-							# Vendor should give a type for each nodes that not's
-							# part of dtschema, so rip.
-							return "unknown"
-					else:
-						# Idk which type give to #****-**** properties
-						# As they wont be in the output, they are "fixed"
-						# And they usually describe a number of cells
-						# Admit their none so we might be able to retrieve these
-						# ez if needed
-						return "none"
+					# Idk which type give to #****-**** properties
+					# As they wont be in the output, they are "fixed"
+					# And they usually describe a number of cells
+					# Admit their none so we might be able to retrieve these
+					# ez if needed
+					return "none"
+
+		if '#' in key:
+			return 'none'
+		# TODO: Else all ???
+		return "unknown"
+
+##
+#	@var		_types_scopes
+#	@brief		Dict where key are id of a files_dict (see SDTBindings._files_dict)
+#			and value a tuple (files_dict, props types, ref types)
+#	@details	Props types is the table of resolved MainProp types, key are
+#			(binding path, property name) and value the type. It is filled
+#			while SDTBindings load every binding to find compatibles, so
+#			get_binding() doesn't have to resolve them again.\n
+#			Ref types memoize type of $ref targets, key are "path#fragment"
+#			and value the type.\n
+#			$ref are resolved by name through files_dict, so types resolved
+#			with a stack of layers are not used with another one (e.g. an
+#			overlay overriding serial.yaml). files_dict is kept in the tuple
+#			so that its id can't be reused.
+_types_scopes = dict()
+
+##
+#	@var		_ref_docs
+#	@brief		This dict contains YAML documents loaded by _ref_type(), key are path
+_ref_docs = dict()
+
+##
+#	@fn		_types_tables(files_dict)
+#	@brief		Return (props types, ref types) of files_dict, see #_types_scopes
+def _types_tables(files_dict):
+	try:
+		return _types_scopes[id(files_dict)][1:]
+	except KeyError:
+		scope = (files_dict, dict(), dict())
+		_types_scopes.update({id(files_dict) : scope})
+		return scope[1:]
+
+##
+#	@fn		_drop_types(files_dict)
+#	@brief		Forget types resolved through files_dict
+def _drop_types(files_dict):
+	_types_scopes.pop(id(files_dict), None)
+
+##
+#	@var		json_types
+#	@brief		This dict contains json-schema 'type' as key where value is
+#			the C equivalent
+json_types = {	"object"	: "void *",
+		"boolean"	: "bool",
+		"string"	: "char *"}
+
+##
+#	@fn		_ref_type(ref, path, files_dict, doc = None)
+#	@brief		Return type of the node pointed by a $ref, following $ref
+#			chains (memoized in ref types of files_dict, see _types_tables())
+#	@param		ref		The $ref value, fragment included (e.g. "#/definitions/foo")
+#	@param		path		Path of the file containing the $ref
+#	@param		files_dict	See SDTBindings._files_dict
+#	@param		doc		Content of path if already loaded
+def _ref_type(ref, path, files_dict, doc = None):
+	file_part, _, fragment = ref.partition('#')
+
+	last = ref.rsplit('/',1)[-1]
+	if file_part.endswith("/schemas/types.yaml") and last in dtschema_types:
+		return dtschema_types[last]
+
+	if file_part:
+		try:
+			target = _ref_path(file_part, path.rsplit('/',1)[0], files_dict)
+		except IndexError:
+			target = None
+		if not target:
+			# e.g. dtschema files, $ref are relative to the file
+			target = path.rsplit('/',1)[0] + '/' + file_part
+			if not _exists(target):
+				return 'unknown'
+		target = os.path.normpath(target)
+		doc = None
+	elif path:
+		target = path
+	else:
+		return 'unknown'
+
+	# dtschema types (e.g. types.yaml#/definitions/uint32 from a dtschema file)
+	if target.startswith(os.path.normpath(dtschema)) and last in dtschema_types:
+		return dtschema_types[last]
+
+	ref_types = _types_tables(files_dict)[1]
+	key = target + '#' + fragment
+	try:
+		return ref_types[key]
+	except KeyError:
+		pass
+	# Avoid infinite recursion on $ref loops
+	ref_types.update({key : 'unknown'})
+
+	if doc is None:
+		try:
+			doc = _ref_docs[target]
+		except KeyError:
+			try:
+				with _open(target) as file_t:
+					doc = yaml.safe_load(file_t)
+			except OSError:
+				doc = None
+			_ref_docs.update({target : doc})
+
+	node = doc
+	for part in fragment.strip('/').split('/') if fragment.strip('/') else ():
+		part = part.replace('~1','/').replace('~0','~')
+		try:
+			node = node[int(part)] if isinstance(node, list) else node[part]
+		except (KeyError, IndexError, ValueError, TypeError):
+			node = None
+			break
+
+	if node is None:
+		type_t = 'unknown'
+	elif not fragment.strip('/') and isinstance(node, dict) and 'properties' in node:
+		# A whole binding, so a node
+		type_t = "void *"
+	else:
+		type_t = _node_type(node, target, files_dict, doc)
+
+	ref_types.update({key : type_t})
+	return type_t
+
+##
+#	@fn		_node_type(node, path, files_dict, doc = None)
+#	@brief		Return type of a schema node (e.g. the target of a $ref)
+#	@details	Follow its $ref, its 'type', then its allOf, oneOf and anyOf
+#			(first known type wins)
+def _node_type(node, path, files_dict, doc = None):
+	if not isinstance(node, dict):
+		return 'unknown'
+
+	if '$ref' in node:
+		type_t = _ref_type(node['$ref'], path, files_dict, doc)
+		if type_t != 'unknown':
+			return type_t
+
+	if 'type' in node:
+		type_t = node['type']
+		if isinstance(type_t, str) and type_t in json_types:
+			return json_types[type_t]
+
+	for name in ('allOf', 'oneOf', 'anyOf'):
+		if isinstance(node.get(name), list):
+			for item in node[name]:
+				type_t = _node_type(item, path, files_dict, doc)
+				if type_t != 'unknown':
+					return type_t
+	return 'unknown'
+
+##
+#	@class 		BindingChange
+#	@brief		This NamedTuple represent what changed for a compatible between
+#			two bindings trees (see diff_bindings())
+#	@details	As NamedTuple var can't be detected by doxygen, here it's how it work:\n
+#			BindingChange is like a C struct, with 7 field:\n
+#				* BindingChange.old_path 		-> Path of the binding in old tree\n
+#				* BindingChange.new_path 		-> Path of the binding in new tree\n
+#				* BindingChange.required_added		-> List of new required properties\n
+#				* BindingChange.required_removed	-> List of required properties no more required\n
+#				* BindingChange.optional_added		-> List of new optional properties\n
+#				* BindingChange.optional_removed	-> List of optional properties no more optional\n
+#				* BindingChange.types			-> Dict where key are property name and
+#									   value (old MainProp.type, new MainProp.type)
+class BindingChange(NamedTuple):
+	old_path: str
+	new_path: str
+	required_added: list
+	required_removed: list
+	optional_added: list
+	optional_removed: list
+	types: dict
+
+##
+#	@class 		BindingsDiff
+#	@brief		This NamedTuple is returned by diff_bindings()
+#	@details	As NamedTuple var can't be detected by doxygen, here it's how it work:\n
+#			BindingsDiff is like a C struct, with 4 field:\n
+#				* BindingsDiff.added 	-> Dict where key are new compatible and value path in new tree\n
+#				* BindingsDiff.removed 	-> Dict where key are removed compatible and value path in old tree\n
+#				* BindingsDiff.changed	-> Dict where key are compatible and value a BindingChange\n
+#				* BindingsDiff.loaded	-> Number of files parsed to find compatible
+#							   (a file unchanged between trees counts once)
+class BindingsDiff(NamedTuple):
+	added: dict
+	removed: dict
+	changed: dict
+	loaded: int
+
+##
+#	@class		BindingsTree
+#	@brief		Content hashes of a bindings tree, used by diff_bindings()
+#	@details	Each YAML file is hashed without being parsed. The hash of a
+#			binding (see merkle()) also contains hashes of every file it
+#			points to with $ref, so if a common binding change, every
+#			binding including it change too.
+class BindingsTree:
+	##
+	#	@var	_ref_re
+	#		Regex used to find $ref in raw YAML
+	_ref_re = re.compile(rb"\$ref:\s*[\"']?([^\s\"'#]+)")
+	##
+	#	@var	_word_re
+	#		Regex used to find words that may be compatible in raw YAML
+	_word_re = re.compile(rb"[\w,.+/-]+")
+
+	def __init__(self, path):
+		##
+		#	@var	_path
+		#		Rootdir of bindings
+		self._path	= path
+		##
+		#	@var	_files_dict
+		#		Same as SDTBindings._files_dict
+		self._files_dict = dict()
+		##
+		#	@var	_hashes
+		#		Dict where key are path relative to #_path and value a
+		#		tuple (content hash, list of $ref found in content)
+		self._hashes	= dict()
+		##
+		#	@var	_merkle
+		#		Dict where key are relative path and value merkle() result
+		self._merkle	= dict()
+		##
+		#	@var	_contents
+		#		Dict where key are relative path and value raw content,
+		#		kept to look for compatible without parsing
+		self._contents	= dict()
+		##
+		#	@var	_refs_cache
+		#		$ref Binding shared by bindings loaded by binding()
+		self._refs_cache = dict()
+
+		for name, file_path in _bindings_files(path):
+			self._files_dict.update({name : file_path})
+			with open(file_path, 'rb') as file_t:
+				content = file_t.read()
+			rel = os.path.relpath(file_path, path)
+			self._contents.update({rel : content})
+			self._hashes.update({rel : (hashlib.sha1(content).digest(), self._ref_re.findall(content))})
+
+		##
+		#	@var	root
+		#		Hash of the whole tree
+		self.root	= hashlib.sha1(b"".join(rel.encode() + hash_t
+			for rel, (hash_t, _) in sorted(self._hashes.items()))).digest()
+
+	def __contains__(self, rel):
+		return rel in self._hashes
+
+	def __iter__(self):
+		return iter(self._hashes)
+
+	##
+	#	@fn		abspath(self, rel)
+	#	@brief		Return path of rel as used by Binding
+	def abspath(self, rel):
+		return self._path + "/" + rel
+
+	##
+	#	@fn		merkle(self, rel)
+	#	@brief		Hash of rel content and of all its $ref (transitively),
+	#			None if rel is not in the tree
+	def merkle(self, rel):
+		try:
+			return self._merkle[rel]
+		except KeyError:
+			pass
+		try:
+			hash_t, refs = self._hashes[rel]
+		except KeyError:
+			return None
+
+		# Avoid infinite recursion on $ref loops
+		self._merkle[rel] = hash_t
+		dirpath = self.abspath(rel).rsplit('/',1)[0]
+		children = list()
+		for ref in refs:
+			try:
+				path = _ref_path(ref.decode(), dirpath, self._files_dict)
+			except IndexError:
+				path = None
+			if not path:
+				continue
+			child = self.merkle(os.path.relpath(os.path.normpath(path), self._path))
+			if child:
+				children.append(child)
+
+		self._merkle[rel] = hashlib.sha1(hash_t + b"".join(sorted(children))).digest()
+		return self._merkle[rel]
+
+	##
+	#	@fn		binding(self, rel, verbose = 0)
+	#	@brief		Load binding of rel (slim mode, $ref shared)
+	def binding(self, rel, verbose = 0):
+		return Binding(self.abspath(rel), self._files_dict, verbose, True, self._refs_cache)
+
+	##
+	#	@fn		compatibles(self, rel, cache)
+	#	@brief		Return the list of compatible found in rel
+	#	@details	Only properties/compatible is read, with yaml.safe_load():
+	#			'compatible' of $ref bindings is hidden (see LayeredProps), so
+	#			claims only depend on rel content.
+	#	@param		cache	Dict where key are content hash and value a list of
+	#				compatible, shared between trees so that a file
+	#				unchanged between them is parsed once
+	def compatibles(self, rel, cache):
+		hash_t = self._hashes[rel][0]
+		try:
+			return cache[hash_t]
+		except KeyError:
+			pass
+
+		try:
+			node = yaml.safe_load(self._contents[rel])['properties']['compatible']
+		except (yaml.YAMLError, KeyError, TypeError):
+			node = None
+		items = [item for item in _raw_compat_items(node) if isinstance(item, str)]
+		cache.update({hash_t : items})
+		return items
+
+	##
+	#	@fn		owners(self, compats, cache)
+	#	@brief		Return a dict where key are compatible of compats and value
+	#			the rel path of the file owning it
+	#	@details	Claims are resolved like SDTBindings._resolve_compat() does,
+	#			except that ties are broken on rel path instead of mtime,
+	#			which is unrelated between two checkouts. Only files whose
+	#			raw content contains one of compats are parsed.
+	#	@param		cache	See compatibles()
+	def owners(self, compats, cache):
+		words = {compat.encode() for compat in compats}
+		claims = dict()
+		for key, path in self._files_dict.items():
+			rel = os.path.relpath(path, self._path)
+			if key == 'snps,dwmac' or words.isdisjoint(self._word_re.findall(self._contents[rel])):
+				continue
+			for item in self.compatibles(rel, cache):
+				if item in compats and _claim_allowed(item, key):
+					claims.setdefault(item, dict()).update({key : rel})
+
+		ret = dict()
+		for item, keys in claims.items():
+			key = min(keys, key = lambda key: _claim_rank(item, key, keys[key], 0))
+			ret.update({item : keys[key]})
+		return ret
+
+##
+#	@fn		diff_bindings(old_path, new_path, verbose = 0)
+#	@brief		Compare two bindings trees (e.g. before and after a kernel bump)
+#	@details	Only compatible of bindings whose hash (see BindingsTree.merkle())
+#			differ are compared. Their owners are resolved in each tree over
+#			the files containing them (see BindingsTree.owners()), a file with
+#			the same content in both trees being parsed once. An unchanged
+#			tree is not parsed at all.
+#	@param		old_path	Rootdir of old bindings
+#	@param		new_path	Rootdir of new bindings
+#	@return		A BindingsDiff
+def diff_bindings(old_path, new_path, verbose = 0):
+	old = BindingsTree(old_path)
+	new = BindingsTree(new_path)
+
+	if old.root == new.root:
+		return BindingsDiff(dict(), dict(), dict(), 0)
+
+	if not nodes_types:
+		_init_dtschema_list(verbose)
+
+	rels = sorted(rel for rel in set(old) | set(new) if old.merkle(rel) != new.merkle(rel))
+
+	# Compatible of bindings whose hash differ, their owners may have
+	# changed too so claims of other files are checked for them
+	cache = dict()
+	compats = set()
+	for rel in rels:
+		for tree in (old, new):
+			if rel in tree:
+				compats.update(tree.compatibles(rel, cache))
+	old_owners = old.owners(compats, cache)
+	new_owners = new.owners(compats, cache)
+
+	added = dict()
+	removed = dict()
+	changed = dict()
+	for compat in sorted(set(old_owners) | set(new_owners)):
+		if not compat in old_owners:
+			added.update({compat : new.abspath(new_owners[compat])})
+		elif not compat in new_owners:
+			removed.update({compat : old.abspath(old_owners[compat])})
+		else:
+			old_rel = old_owners[compat]
+			new_rel = new_owners[compat]
+			if old_rel == new_rel and old.merkle(old_rel) == new.merkle(new_rel):
+				continue
+			change = _binding_change(old.abspath(old_rel), old.binding(old_rel, verbose),
+						 new.abspath(new_rel), new.binding(new_rel, verbose),
+						 old_rel != new_rel)
+			if change:
+				changed.update({compat : change})
+
+	_drop_types(old._files_dict)
+	_drop_types(new._files_dict)
+	return BindingsDiff(added, removed, changed, len(cache))
+
+##
+#	@fn		_binding_change(old_path, old, new_path, new, moved = False)
+#	@brief		Return a BindingChange between Binding old and new, or None
+#			if required, optional and types are the same
+#	@param		moved	True if the compatible is owned by another file
+def _binding_change(old_path, old, new_path, new, moved = False):
+	old_props = old._props._props
+	new_props = new._props._props
+	types = {key : (old_props[key].type, new_props[key].type)
+		 for key in new_props if key in old_props and old_props[key].type != new_props[key].type}
+
+	change = BindingChange(old_path, new_path,
+			       [item for item in new.required() if not item in old.required()],
+			       [item for item in old.required() if not item in new.required()],
+			       [item for item in new.optional() if not item in old.optional()],
+			       [item for item in old.optional() if not item in new.optional()],
+			       types)
+
+	if any(change[2:]) or moved:
+		return change
+	return None
+
+##
+#	@fn		_export_record(binding, path, compats)
+#	@brief		Return the dict exported by SDTBindings.export() for a Binding
+#	@details	Record keys are:\n
+#				* path, file_name, id, schema, title, maintainers\n
+#				* compatible	-> List of compatible resolved to this binding\n
+#				* required, optional	-> Lists of properties names\n
+#				* props	-> Dict where key are MainProp name and value
+#					   {"t": MainProp.type, "v": value}\n
+#			In values, a Prop is {"n": Prop.name, "v": value}, a raw dict is
+#			{"d": dict} and lists and scalars are kept as is.
+def _export_record(binding, path, compats):
+	return {"path"		: path,
+		"file_name"	: binding.file_name,
+		"id"		: binding.id,
+		"schema"	: binding.schema,
+		"title"		: binding.title,
+		"maintainers"	: binding.maintainers,
+		"compatible"	: compats,
+		"required"	: binding.required(),
+		"optional"	: binding.optional(),
+		"props"		: {key : {"t" : prop.type, "v" : _export_value(prop.value)}
+				   for key, prop in binding._props._props.items()}}
+
+##
+#	@fn		_export_value(value)
+#	@brief		Encode a Prop value, see _export_record()
+def _export_value(value):
+	if isinstance(value, Prop):
+		return {"n" : value.name, "v" : _export_value(value.value)}
+	elif isinstance(value, list):
+		return [_export_value(item) for item in value]
+	elif isinstance(value, dict):
+		return {"d" : {key : _export_value(item) for key, item in value.items()}}
+	return value
+
+##
+#	@fn		_import_value(value)
+#	@brief		Decode a Prop value encoded by _export_value()
+def _import_value(value):
+	if isinstance(value, list):
+		return [_import_value(item) for item in value]
+	elif isinstance(value, dict):
+		if "n" in value:
+			return Prop(value["n"], _import_value(value["v"]))
+		return {key : _import_value(item) for key, item in value["d"].items()}
+	return value
+
+##
+#	@var		_export_state
+#	@brief		(files_dict, slim) of export worker processes, see _export_init()
+_export_state = None
+
+##
+#	@fn		_export_init(files_dict, nodes, props, slim, schemas)
+#	@brief		Init an export worker process
+#	@param		schemas		Path of the dtschema source of the parent process
+#					(see _schema_path()), as a spawned process doesn't inherit it
+def _export_init(files_dict, nodes, props, slim, schemas):
+	global _export_state
+	if schemas:
+		set_schema_source(schemas)
+	nodes_types.update(nodes)
+	_types_tables(files_dict)[0].update(props)
+	_export_state = (files_dict, slim, dict() if slim else None)
+
+##
+#	@fn		_export_worker(item)
+#	@brief		Load a binding and return its JSON record, item is (path, compats)
+def _export_worker(item):
+	path, compats = item
+	files_dict, slim, refs_cache = _export_state
+	return json.dumps(_export_record(Binding(path,files_dict,0,slim,refs_cache), path, compats), default = str)
+
+##
+#	@fn		load_export(source)
+#	@brief		Read a file written by SDTBindings.export()
+#	@param		source	A path or a file object, "ndjson" or "json" format
+#	@return		An ExportedBindings item
+def load_export(source):
+	if isinstance(source, str):
+		with open(source, 'r') as file_t:
+			return load_export(file_t)
+
+	first = source.read(1)
+	while first and first.isspace():
+		first = source.read(1)
+
+	if first == "[":
+		records = json.loads(first + source.read())
+	else:
+		records = (json.loads(line) for line in _prepend(first, source) if line.strip())
+	return ExportedBindings(records)
+
+##
+#	@fn		_prepend(first, file_t)
+#	@brief		Yield lines of file_t, first being the already read first char
+def _prepend(first, file_t):
+	yield first + file_t.readline()
+	yield from file_t
+
+##
+#	@class		ExportedBindings
+#	@brief		Bindings read from an export (see load_export()), without any YAML
+#	@details	get_binding() returns Binding items that can be used as the ones
+#			of SDTBindings (required(), optional(), get_prop_by_name()...)
+class ExportedBindings:
+	def __init__(self, records):
+		##
+		#	@var	_compat_dict
+		#		Dict where key are compatible and value a Binding
+		self._compat_dict = dict()
+		##
+		#	@var	_bindings
+		#		Dict where key are path and value a Binding
+		self._bindings	= dict()
+
+		for record in records:
+			binding = Binding.from_record(record)
+			self._bindings.update({record["path"] : binding})
+			for compat in record["compatible"]:
+				self._compat_dict.update({compat : binding})
+
+	##
+	#	@fn		get_binding(self, compatible)
+	#	@brief		Return the Binding of compatible, or None
+	def get_binding(self, compatible):
+		return self._compat_dict.get(compatible)
+
+	##
+	#	@fn		compatibles(self)
+	#	@brief		Return the list of known compatible
+	def compatibles(self):
+		return list(self._compat_dict)
+
+##
+#	@class 		BindingCost
+#	@brief		This NamedTuple represent the resolution cost of a binding file
+#	@details	As NamedTuple var can't be detected by doxygen, here it's how it work:\n
+#			BindingCost is like a C struct, with 9 field:\n
+#				* BindingCost.path 	-> Path of the binding file\n
+#				* BindingCost.compatibles -> Tuple of compatible resolved to this file\n
+#				* BindingCost.time	-> Seconds spent in Binding(), $ref included\n
+#				* BindingCost.ref_depth	-> Depth of the longest $ref chain\n
+#				* BindingCost.ref_fanout -> Number of $ref in allOf node\n
+#				* BindingCost.refs	-> Number of Binding loaded through $ref\n
+#				* BindingCost.props	-> Number of Prop and MainProp, nested ones included\n
+#				* BindingCost.regexes	-> Number of patternProperties and pattern\n
+#				* BindingCost.bytes	-> Approximate size in bytes of the Binding
+class BindingCost(NamedTuple):
+	path: str
+	compatibles: tuple
+	time: float
+	ref_depth: int
+	ref_fanout: int
+	refs: int
+	props: int
+	regexes: int
+	bytes: int
+
+##
+#	@fn		_ref_stats(binding)
+#	@brief		Return (depth, count) of the $ref tree of binding
+def _ref_stats(binding):
+	depth = 0
+	count = 0
+	stack = [(ref, 1) for ref in binding._refs]
+	while stack:
+		ref, level = stack.pop()
+		depth = max(depth, level)
+		count += 1
+		stack.extend((sub, level + 1) for sub in ref._refs)
+	return depth, count
+
+##
+#	@fn		_prop_stats(props)
+#	@brief		Return (Prop count, regex count) of props and their sub Prop
+#	@details	Regexes are Prop named "pattern" and Prop whose name is a
+#			regular expression (patternProperties keys, e.g. "^uart-[0-9]+$").
+#			Schema keywords (e.g. "$ref") are not regexes
+def _prop_stats(props):
+	count = 0
+	regexes = 0
+	stack = list(props)
+	while stack:
+		prop = stack.pop()
+		if isinstance(prop, (Prop, MainProp)):
+			count += 1
+			# Names may be non str YAML keys (e.g. 1: foo)
+			if prop.name == "pattern" or (isinstance(prop.name, str) and not prop.name.startswith('$')
+						      and _regex_chars.intersection(prop.name)):
+				regexes += 1
+			stack.append(prop.value)
+		elif isinstance(prop, list):
+			stack.extend(prop)
+	return count, regexes
+
+##
+#	@var		_regex_chars
+#	@brief		Chars that can't be found in a property name, only in a regex
+_regex_chars = frozenset("^$*+?[]()|\\")
+
+##
+#	@class		BindingsProfile
+#	@brief		List of BindingCost returned by SDTBindings.profile()
+#	@details	Written with to_json() and read back with load_profile(), so
+#			costs of several kernel versions can be compared.
+class BindingsProfile:
+	def __init__(self, costs):
+		##
+		#	@var	costs
+		#		List of BindingCost
+		self.costs	= list(costs)
+
+	##
+	#	@fn		top(self, count = 20, key = "time")
+	#	@brief		Return the count most expensive BindingCost
+	#	@param		key	A BindingCost field to sort on (e.g. "bytes")
+	def top(self, count = 20, key = "time"):
+		if not key in BindingCost._fields or key in ("path", "compatibles"):
+			raise ValueError("Cannot sort on <%s>" % key)
+		return sorted(self.costs, key = lambda cost: (-getattr(cost, key), cost.path))[:count]
+
+	##
+	#	@fn		table(self, count = 20, key = "time")
+	#	@brief		Return top() as a text table
+	def table(self, count = 20, key = "time"):
+		lines = ["%9s %5s %6s %5s %6s %7s %9s  %s" % ("time (ms)", "depth", "fanout", "refs",
+			 "props", "regexes", "bytes", "file")]
+		for cost in self.top(count, key):
+			lines.append("%9.2f %5d %6d %5d %6d %7d %9d  %s" % (cost.time * 1000, cost.ref_depth,
+				     cost.ref_fanout, cost.refs, cost.props, cost.regexes, cost.bytes,
+				     cost.path.rsplit('/',1)[-1]))
+		return "\n".join(lines)
+
+	##
+	#	@fn		to_json(self, out = None)
+	#	@brief		Write all BindingCost as a JSON list of objects
+	#	@param		out	A path or a file object (stdout if None)
+	def to_json(self, out = None):
+		if isinstance(out, str):
+			with open(out, 'w') as file_t:
+				return self.to_json(file_t)
+		json.dump([cost._asdict() for cost in self.costs], out or sys.stdout, indent = 1)
+
+##
+#	@fn		load_profile(source)
+#	@brief		Read a file written by BindingsProfile.to_json()
+#	@param		source	A path or a file object
+#	@return		A BindingsProfile item
+def load_profile(source):
+	if isinstance(source, str):
+		with open(source, 'r') as file_t:
+			return load_profile(file_t)
+
+	costs = list()
+	for record in json.load(source):
+		record.update({"compatibles" : tuple(record["compatibles"])})
+		costs.append(BindingCost(**record))
+	return BindingsProfile(costs)
+
+##
+#	@class		ValidatorCache
+#	@brief		Compiled jsonschema validators of bindings
+#	@details	Validators are cached by hash of the binding content and of
+#			every binding it includes through $ref (see BindingsTree.merkle()),
+#			and $ref (e.g. "/schemas/types.yaml#", "serial.yaml#") are resolved
+#			through a local registry over bindings rootdirs and #dtschema,
+#			no network access is done.\n
+#			Like dt-validate, schemas are fixed up by dtschema (e.g.
+#			'compatible: enum' becomes an array of string) if it is installed.\n
+#			jsonschema is only imported when a validator is built.
+class ValidatorCache:
+	##
+	#	@var	_prefixes
+	#		URI prefixes of devicetree.org schemas, with the #dtschema subdir
+	#		to look them in. "/schemas/" ones are looked in bindings
+	#		rootdirs first
+	_prefixes = (("http://devicetree.org/schemas/", "/schemas/"),
+		     ("https://devicetree.org/schemas/", "/schemas/"),
+		     ("http://devicetree.org/meta-schemas/", "/meta-schemas/"),
+		     ("https://devicetree.org/meta-schemas/", "/meta-schemas/"))
+
+	def __init__(self, roots):
+		##
+		#	@var	_roots
+		#		List of bindings rootdirs, last one has precedence
+		self._roots	= list(roots)
+		##
+		#	@var	_validators
+		#		Dict where key are binding hash (see #_keys) and value a validator
+		self._validators = dict()
+		##
+		#	@var	_keys
+		#		Dict where key are binding path and value the hash of its
+		#		content, its $ref and layers it doesn't belong to (or None
+		#		until refresh())
+		self._keys	= None
+		##
+		#	@var	_mtimes
+		#		Dict where key are path of YAML files of rootdirs and value
+		#		their last modification time when #_keys has been computed
+		self._mtimes	= dict()
+		##
+		#	@var	_docs
+		#		Dict where key are path and value loaded YAML
+		self._docs	= dict()
+		##
+		#	@var	_registry
+		#		referencing.Registry shared by all validators (or None)
+		self._registry	= None
+
+	##
+	#	@fn		validator(self, path)
+	#	@brief		Return the validator of binding path
+	def validator(self, path):
+		if self._keys is None:
+			self.refresh()
+		try:
+			hash_t = self._keys[os.path.normpath(path)]
+		except KeyError:
+			# Not in rootdirs
+			with open(path, 'rb') as file_t:
+				hash_t = hashlib.sha1(file_t.read()).digest()
+			self._keys.update({os.path.normpath(path) : hash_t})
 
-			if '#' in key:
-				return 'none'
-			# TODO: Else all ???
-			return "unknown"
+		try:
+			return self._validators[hash_t]
+		except KeyError:
+			validator = self._build(self._load(path))
+			self._validators.update({hash_t : validator})
+			return validator
+
+	##
+	#	@fn		clear(self)
+	#	@brief		Forget every validator (e.g. if files have been modified)
+	def clear(self):
+		self._validators.clear()
+		self._keys = None
+		self._mtimes.clear()
+		self._docs.clear()
+		self._registry = None
+
+	##
+	#	@fn		refresh(self)
+	#	@brief		Hash bindings of rootdirs again if they have been modified
+	#			(added, removed or mtime changed) since last call
+	#	@details	Loaded YAML and the registry are dropped, validators of
+	#			bindings whose hash didn't change are kept.
+	def refresh(self):
+		mtimes = dict()
+		for root in self._roots:
+			for _, path in _bindings_files(root):
+				try:
+					mtimes.update({path : os.stat(path).st_mtime})
+				except OSError:
+					pass
+		if self._keys is not None and mtimes == self._mtimes:
+			return
+
+		trees = [BindingsTree(root) for root in self._roots]
+		self._keys = dict()
+		for i, tree in enumerate(trees):
+			# $ref to another layer are not followed by merkle()
+			others = b"".join(other.root for j, other in enumerate(trees) if j != i)
+			for rel in tree:
+				self._keys.update({os.path.normpath(tree.abspath(rel)) :
+					hashlib.sha1(tree.merkle(rel) + others).digest()})
+		self._mtimes = mtimes
+		self._docs.clear()
+		self._registry = None
+
+	##
+	#	@fn		_build(self, schema)
+	#	@brief		Compile a validator for schema
+	def _build(self, schema):
+		import jsonschema
+
+		try:
+			import referencing
+		except ImportError:
+			# jsonschema < 4.18
+			resolver = jsonschema.RefResolver.from_schema(schema,
+				handlers = {"http" : self._load_uri, "https" : self._load_uri})
+			return jsonschema.Draft201909Validator(schema, resolver = resolver)
+
+		if self._registry is None:
+			self._registry = referencing.Registry(retrieve = self._retrieve)
+		return jsonschema.Draft201909Validator(schema, registry = self._registry)
+
+	##
+	#	@fn		_retrieve(self, uri)
+	#	@brief		referencing retrieve function, see _load_uri()
+	def _retrieve(self, uri):
+		import referencing
+		import referencing.jsonschema
+		import referencing.exceptions
+
+		doc = self._load_uri(uri)
+		if doc is None:
+			raise referencing.exceptions.NoSuchResource(ref = uri)
+		return referencing.Resource.from_contents(doc,
+			default_specification = referencing.jsonschema.DRAFT201909)
+
+	##
+	#	@fn		_load_uri(self, uri)
+	#	@brief		Return YAML of a devicetree.org URI from local files (or None)
+	#	@details	Bindings rootdirs are searched first (last one first), then
+	#			#dtschema
+	def _load_uri(self, uri):
+		uri = uri.split('#')[0]
+		for prefix, subdir in self._prefixes:
+			if uri.startswith(prefix):
+				rel = uri[len(prefix):]
+				paths = [root + '/' + rel for root in reversed(self._roots)] if subdir == "/schemas/" else []
+				paths.append(dtschema + subdir + rel)
+				for path in paths:
+					if _exists(path):
+						return self._load(path)
+		return None
+
+	##
+	#	@fn		_load(self, path)
+	#	@brief		Return YAML of path, loaded once
+	def _load(self, path):
+		try:
+			return self._docs[path]
+		except KeyError:
+			with _open(path) as file_t:
+				doc = yaml.safe_load(file_t)
+			rel = _schema_rel(path)
+			if isinstance(doc, dict) and not (rel and rel.startswith("meta-schemas/")):
+				self._fixup(doc)
+			self._docs.update({path : doc})
+			return doc
+
+	##
+	#	@fn		_fixup(self, schema)
+	#	@brief		Fix up schema in place with dtschema, as dt-validate does
+	#			before validating. schema is used as is if dtschema isn't installed
+	def _fixup(self, schema):
+		try:
+			import dtschema
+		except ImportError:
+			return
+		dtschema.fixup_schema(schema)
+
+##
+#	@fn		_validate_node(validators, item)
+#	@brief		Validate a node, item is (binding path, compatible, node dict)
+#	@return		A list of errors messages
+def _validate_node(validators, item):
+	path, compat, node = item
+	if path is None:
+		return ["No binding found for <%s>" % compat]
+	try:
+		return [error.message for error in validators.validator(path).iter_errors(_dt_node(node))]
+	except Exception as error:
+		# e.g. a $ref that can't be resolved, don't stop other nodes
+		return ["Cannot validate against <%s>: %s" % (path, error)]
+
+##
+#	@fn		_dt_node(node)
+#	@brief		Return a copy of node with values as dtschema decodes them from
+#			a dtb, which is what types.yaml and fixed up schemas expect
+#	@details	e.g. "okay" -> ["okay"], 115200 -> [[115200]] and
+#			[0x1000, 0x400] -> [[0x1000, 0x400]]. Lists of string, matrix,
+#			booleans and values already in this form are kept as is.
+def _dt_node(node):
+	ret = dict()
+	for key, value in node.items():
+		if isinstance(value, dict):
+			value = _dt_node(value)
+		elif isinstance(value, str):
+			value = [value]
+		elif isinstance(value, int) and not isinstance(value, bool):
+			value = [[value]]
+		elif isinstance(value, list) and value and all(isinstance(item, int) and not isinstance(item, bool) for item in value):
+			value = [value]
+		ret.update({key : value})
+	return ret
+
+##
+#	@var		_validate_state
+#	@brief		ValidatorCache of validation worker processes
+_validate_state = None
+
+##
+#	@fn		_validate_init(roots, schemas)
+#	@brief		Init a validation worker process
+#	@param		schemas		See _export_init()
+def _validate_init(roots, schemas):
+	global _validate_state
+	if schemas:
+		set_schema_source(schemas)
+	_validate_state = ValidatorCache(roots)
+
+##
+#	@fn		_validate_worker(item)
+#	@brief		Validate a node in a worker process, see _validate_node()
+def _validate_worker(item):
+	return _validate_node(_validate_state, item)
+
+##
+#	@class 		SyncStats
+#	@brief		This NamedTuple is returned by sync_mirror()
+#	@details	As NamedTuple var can't be detected by doxygen, here it's how it work:\n
+#			SyncStats is like a C struct, with 4 field:\n
+#				* SyncStats.downloaded 		-> Number of files downloaded\n
+#				* SyncStats.not_modified 	-> Number of files unchanged since last sync\n
+#				* SyncStats.resumed		-> Number of files already done by an interrupted sync\n
+#				* SyncStats.failed		-> Number of files (or dir listings) that couldn't be fetched
+class SyncStats(NamedTuple):
+	downloaded: int
+	not_modified: int
+	resumed: int
+	failed: int
+
+##
+#	@fn		sync_mirror(url, dest, concurrency = 8, pattern = ".yaml", verbose = 0)
+#	@brief		Mirror files of an HTTP directory listing (e.g. #bindings_url) in dest
+#	@details	See MirrorSync
+#	@return		A SyncStats item
+def sync_mirror(url, dest, concurrency = 8, pattern = ".yaml", verbose = 0):
+	return MirrorSync(url, dest, concurrency, pattern, verbose).run()
+
+##
+#	@class		MirrorSync
+#	@brief		Mirror files of an HTTP directory listing and its subdirs
+#	@details	Files are fetched with asyncio, at most concurrency requests
+#			at a time. ETag and Last-Modified of each file are stored in
+#			dest/.mirror.json so next sync only download modified files.\n
+#			Files are written in a staging dir (dest.partial) which
+#			replaces dest once everything has been fetched, so dest is never
+#			half written. If a sync is interrupted (or some files failed),
+#			next sync resume from the staging dir journal.
+class MirrorSync:
+	##
+	#	@var	_manifest_name
+	#		Name of the file storing ETag and Last-Modified of each file
+	_manifest_name	= ".mirror.json"
+	##
+	#	@var	_journal_name
+	#		Name of the file listing files done in staging dir
+	_journal_name	= ".mirror.journal"
+
+	def __init__(self, url, dest, concurrency = 8, pattern = ".yaml", verbose = 0, timeout = 30):
+		##
+		#	@var	_url
+		#		URL of the mirrored dir listing
+		self._url	= url if url.endswith('/') else url + '/'
+		##
+		#	@var	_dest
+		#		Local dir of the mirror
+		self._dest	= dest.rstrip('/')
+		##
+		#	@var	_staging
+		#		Dir where files are written until the sync is complete
+		self._staging	= self._dest + ".partial"
+		##
+		#	@var	_old
+		#		Previous #_dest while it's swapped with #_staging
+		self._old	= self._dest + ".old"
+		self._concurrency = concurrency
+		self._pattern	= pattern
+		self._verbose	= verbose
+		self._timeout	= timeout
+		##
+		#	@var	_manifest
+		#		Dict where key are relative path and value a dict with
+		#		"etag" and "last_modified" of the current mirror
+		self._manifest	= dict()
+		##
+		#	@var	_done
+		#		Same as #_manifest for files already in #_staging
+		self._done	= dict()
+		self._dirs	= set()
+		self._journal	= None
+		self._sem	= None
+		self._stats	= dict.fromkeys(SyncStats._fields, 0)
+
+	##
+	#	@fn		run(self)
+	#	@brief		Do the sync
+	#	@return		A SyncStats item
+	def run(self):
+		return asyncio.run(self._run())
+
+	async def _run(self):
+		self._recover()
+		os.makedirs(self._staging, exist_ok = True)
+
+		self._manifest	= self._load_json(self._dest + '/' + self._manifest_name)
+		self._done	= self._load_journal()
+		self._sem	= asyncio.Semaphore(self._concurrency)
+
+		with open(self._staging + '/' + self._journal_name, 'a') as self._journal:
+			await self._crawl(self._url)
+
+		stats = SyncStats(**self._stats)
+		if stats.failed:
+			# Keep staging dir, next sync will resume
+			return stats
+
+		with open(self._staging + '/' + self._manifest_name, 'w') as file_t:
+			json.dump(self._done, file_t, indent = 0, sort_keys = True)
+		os.remove(self._staging + '/' + self._journal_name)
+
+		if os.path.exists(self._dest):
+			os.replace(self._dest, self._old)
+		os.replace(self._staging, self._dest)
+		shutil.rmtree(self._old, ignore_errors = True)
+
+		if self._verbose:
+			print("[INFO]: Mirror of %s: %s" % (self._url, stats))
+		return stats
+
+	##
+	#	@fn		_recover(self)
+	#	@brief		Fix a sync interrupted while swapping dirs
+	def _recover(self):
+		if os.path.exists(self._old):
+			if os.path.exists(self._dest):
+				shutil.rmtree(self._old)
+			else:
+				os.replace(self._old, self._dest)
+
+	##
+	#	@fn		_load_journal(self)
+	#	@brief		Return files done by an interrupted sync, and remove
+	#			partially written files
+	def _load_journal(self):
+		done = dict()
+		try:
+			with open(self._staging + '/' + self._journal_name, 'r') as file_t:
+				for line in file_t:
+					try:
+						rel, meta = json.loads(line)
+					except ValueError:
+						# Interrupted while writing this line
+						continue
+					done.update({rel : meta})
+		except OSError:
+			pass
+
+		for dirpath, _, filenames in os.walk(self._staging):
+			for file in filenames:
+				if file.endswith(".part"):
+					os.remove(dirpath + '/' + file)
+		return done
+
+	##
+	#	@fn		_load_json(path)
+	#	@brief		Return content of a JSON file, or an empty dict
+	@staticmethod
+	def _load_json(path):
+		try:
+			with open(path, 'r') as file_t:
+				return json.load(file_t)
+		except (OSError, ValueError):
+			return dict()
+
+	##
+	#	@fn		_crawl(self, url)
+	#	@brief		Fetch a dir listing, then its files and subdirs
+	async def _crawl(self, url):
+		if url in self._dirs:
+			return
+		self._dirs.add(url)
+
+		status, body, _ = await self._get(url, dict())
+		if status != 200:
+			if self._verbose:
+				print("[ERR ]: Cannot list %s (%s)" % (url, status))
+			self._stats["failed"] += 1
+			return
+
+		parser = _LinkParser()
+		parser.feed(body.decode('utf-8', 'replace'))
+
+		tasks = list()
+		for href in parser.links:
+			if '?' in href or href.startswith('#'):
+				continue
+			target = urllib.parse.urljoin(url, href)
+			# --no-parent
+			if not target.startswith(self._url) or len(target) <= len(url):
+				continue
+			if target.endswith('/'):
+				tasks.append(self._crawl(target))
+			elif target.endswith(self._pattern):
+				tasks.append(self._file(target))
+		await asyncio.gather(*tasks)
+
+	##
+	#	@fn		_file(self, url)
+	#	@brief		Fetch a file in #_staging, unless it's unchanged or already done
+	async def _file(self, url):
+		rel = urllib.parse.unquote(url[len(self._url):])
+		# e.g. "%2e%2e/evil.yaml" would be written outside of #_staging
+		norm = os.path.normpath(rel)
+		if os.path.isabs(norm) or norm.split('/')[0] in ('..', '.'):
+			if self._verbose:
+				print("[WARN]: Ignoring %s, outside of %s" % (url, self._url))
+			return
+
+		if rel in self._done:
+			self._stats["resumed"] += 1
+			return
+
+		current = self._dest + '/' + rel
+		meta = self._manifest.get(rel, dict()) if os.path.exists(current) else dict()
+		headers = dict()
+		if meta.get("etag"):
+			headers.update({"If-None-Match" : meta["etag"]})
+		if meta.get("last_modified"):
+			headers.update({"If-Modified-Since" : meta["last_modified"]})
+
+		status, body, resp_headers = await self._get(url, headers)
+
+		path = self._staging + '/' + rel
+		os.makedirs(path.rsplit('/',1)[0], exist_ok = True)
+		if status == 304:
+			try:
+				os.link(current, path)
+			except OSError:
+				shutil.copy2(current, path)
+			self._stats["not_modified"] += 1
+		elif status == 200:
+			with open(path + ".part", 'wb') as file_t:
+				file_t.write(body)
+			os.replace(path + ".part", path)
+			meta = {"etag" : resp_headers.get("ETag"), "last_modified" : resp_headers.get("Last-Modified")}
+			self._stats["downloaded"] += 1
+		else:
+			if self._verbose:
+				print("[ERR ]: Cannot download %s (%s)" % (url, status))
+			self._stats["failed"] += 1
+			return
+
+		if self._verbose > 2:
+			print("[INFO]: %s %s" % ("Unchanged" if status == 304 else "Downloaded", rel))
+		self._done.update({rel : meta})
+		self._journal.write(json.dumps([rel, meta]) + "\n")
+		self._journal.flush()
+
+	##
+	#	@fn		_get(self, url, headers)
+	#	@brief		GET url in a thread, at most #_concurrency at a time
+	#	@return		(HTTP status, body, headers), status is 0 on network error
+	async def _get(self, url, headers):
+		async with self._sem:
+			return await asyncio.to_thread(self._request, url, headers)
+
+	def _request(self, url, headers, retries = 2):
+		request = urllib.request.Request(url, headers = headers)
+		for attempt in range(retries + 1):
+			try:
+				with urllib.request.urlopen(request, timeout = self._timeout) as response:
+					return response.status, response.read(), response.headers
+			except urllib.error.HTTPError as error:
+				if error.code < 500 or attempt == retries:
+					return error.code, b"", error.headers
+			except (urllib.error.URLError, OSError):
+				if attempt == retries:
+					return 0, b"", dict()
+		return 0, b"", dict()
+
+##
+#	@class		_LinkParser
+#	@brief		Collect href of an HTML dir listing
+class _LinkParser(HTMLParser):
+	def __init__(self):
+		super().__init__()
+		self.links = list()
+
+	def handle_starttag(self, tag, attrs):
+		if tag == 'a':
+			for name, value in attrs:
+				if name == 'href' and value:
+					self.links.append(value)
+
+##
+#	@fn		_bindings_files(path)
+#	@brief		Yield (name, path) of every YAML file in subdir of path
+#	@details	name is the file name without extension (e.g. serial)
+def _bindings_files(path):
+	for dirpath, dirnames, filenames in os.walk(path):
+		# Sorted so that result doesn't depend on filesystem
+		dirnames.sort()
+		if dirpath != path:
+			for file in sorted(filenames):
+				if ".yaml" in file:
+					yield file.split('.')[0], dirpath + "/" + file
+
+##
+#	@fn		_compat_items(compat)
+#	@brief		Yield every compatible string of a 'compatible' MainProp value
+#	@todo		Process compatible with "pattern"
+def _compat_items(compat):
+	if isinstance(compat, Prop):
+		if compat.name == 'const':
+			yield compat.value
+
+		elif compat.name == 'enum':
+			yield from compat.value
+
+		elif compat.name in ('contains','items','oneOf','allOf','anyOf'):
+			yield from _compat_items(compat.value)
+
+		elif compat.name == "pattern":
+			# TODO
+			pass
+
+		else:
+			# Description and deprecated, ignore it
+			pass
+	else:
+		if type(compat) is str:
+			yield compat
+		if type(compat) == list:
+			for item in compat:
+				yield from _compat_items(item)
+
+##
+#	@fn		_raw_compat_items(node)
+#	@brief		Same as _compat_items() for a 'compatible' node of raw YAML
+def _raw_compat_items(node):
+	if isinstance(node, dict):
+		for name in ('const', 'enum', 'contains', 'items', 'oneOf', 'allOf', 'anyOf'):
+			if name in node:
+				yield from _raw_compat_items(node[name])
+	elif isinstance(node, list):
+		for item in node:
+			yield from _raw_compat_items(item)
+	elif node is not None:
+		yield node
+
+##
+#	@fn		_claim_allowed(item, key)
+#	@brief		Check if compatible item can be part of SDTBindings._compat_dict
+#			through file key
+#	@details	Avoid process compat outside of it base binding
+def _claim_allowed(item, key):
+	if ',' in item or item in key or key in item or not '-' in item:
+		return True
+	# Some compat like pwm-leds or gpio-leds are stored in
+	# a file name that is reversed
+	# e.g. pwm-leds is part of leds-pwm.yaml)
+	if not "-" in key and item.split("-")[1] == key:
+		return True
+	elif any(x in key.split("-") for x in item.split("-")):
+		# simple-bus is a schema and can be added to this list
+		# by fsl,spba-bus.yaml but, it shouldn't be in this list
+		# since this list doesn't contains schemas
+		return item != "simple-bus"
+	elif key == "opp-v2": # The only one exception
+		return True
+	# simple-mfd had no yaml
+	return item != "simple-mfd"
+
+##
+#	@fn		_claim_rank(item, key, path, mtime)
+#	@brief		Sort key of file key (at path) claiming compatible item, lower
+#			is better. Used by SDTBindings._resolve_compat() and diff_bindings()
+def _claim_rank(item, key, path, mtime):
+	if item == key:
+		return (0, 0, path)
+	elif item in key or key in item:
+		return (1, -mtime, path)
+	elif set(item.split('-')) & set(key.split('-')):
+		# e.g. pwm-leds is part of leds-pwm.yaml
+		return (2, -mtime, path)
+	elif ',' in item:
+		return (3, -mtime, path)
+	return (3, 0, path)
+
+##
+#	@fn		_ref_path(ref, dirpath, files_dict)
+#	@brief		Return path of the binding pointed by a $ref
+#	@param		ref		The $ref value
+#	@param		dirpath		Dir of the binding containing the $ref
+#	@param		files_dict	See SDTBindings._files_dict
+#	@return		A path or None if not found
+def _ref_path(ref, dirpath, files_dict):
+	# Absolute ref (e.g. /schemas/serial/serial.yaml), like
+	# ValidatorCache._load_uri() bindings rootdirs are searched first:
+	# through files_dict, so an overlay wins over upstream. Otherwise it
+	# points on a dt-schema, path used is defined at top of this script
+	if "schemas/" in ref:
+		#TODO:  Instead of spliting on '#', we should be able
+		#       to handle the case where there node ref
+		#       after this '#'. (If it make sens)
+		rel = ref.split('#')[0].split("schemas/",1)[1]
+		path = files_dict.get(rel.rsplit('/',1)[-1].split('.')[0])
+		# A file with the same name in another dir is not the one
+		if path and os.path.normpath(path).endswith(os.sep + os.path.normpath(rel)):
+			return path
+		return dtschema + ref.split('#')[0]
+
+	# Relative path
+	elif "../" in ref:
+		path = dirpath.rsplit('/',1)[0] + ref.replace('..','').replace('#','')
+		# Might be in another layer (see BindingsLayer), look for it by name
+		if not _exists(path):
+			name = path.rsplit('/',1)[1].replace('.yaml','')
+			if name in files_dict:
+				return files_dict[name]
+		return path
+
+	# There is multiple common.yaml.
+	# Some of them have relative path and can be process
+	# with the above statement, other generally are
+	# stored in other dir
+	# e.g. root_dir/dir_a/subdir_a/myfile.yaml
+	#   _______________________________|
+	#  |-> root_dir/dir_b/common.yaml
+	elif "/common.yaml" in ref:
+		path = dirpath
+		# This loop is used to get back to root dir
+		while path.rsplit('/',1)[1] != "bindings":
+			path = path.rsplit('/',1)[0]
+		return path + '/' + ref.split('#')[0]
+
+	# Finaly, normal ref
+	#TODO:  Same as above
+	name = ref.split('#')[0].replace('.yaml','')
+
+	if '/' in name:
+		name = name.rsplit('/',1)[1]
+
+	return files_dict.get(name)
+
+##
+#	@fn		set_schema_source(path)
+#	@brief		Choose where files under #dtschema are read from
+#	@details	There is one source per process, shared by every SDTBindings.
+#			Choosing another one drops #nodes_types and cached layers (see
+#			clear_layers_cache()), so the next SDTBindings resolves types
+#			from the new source. Existing SDTBindings then resolve types
+#			of bindings not loaded yet with the new source too.
+#	@param		path	A dtschema dir (containing schemas/), a zip archive of
+#				dt-schema (e.g. github main.zip) or a dtschema wheel
+def set_schema_source(path):
+	global schema_source
+	if schema_source is not None and os.path.abspath(schema_source.path) == os.path.abspath(path.rstrip('/')):
+		return schema_source
+
+	source = ZipSchemaSource(path) if zipfile.is_zipfile(path) else DirSchemaSource(path)
+	if schema_source is not None:
+		# Types come from the previous dt-schema version
+		nodes_types.clear()
+		clear_layers_cache()
+	schema_source = source
+	return schema_source
+
+##
+#	@fn		_get_schema_source()
+#	@brief		Return #schema_source, looking for one if not set
+#	@details	In order: #dtschema dir, #dtschema_zip archive, then dtschema
+#			python package if installed. None if there is none.
+def _get_schema_source():
+	global schema_source
+	if schema_source is None:
+		if os.path.isdir(dtschema):
+			schema_source = DirSchemaSource(dtschema)
+		elif os.path.exists(dtschema_zip):
+			schema_source = ZipSchemaSource(dtschema_zip)
+		else:
+			spec = importlib.util.find_spec("dtschema")
+			if spec and spec.origin:
+				schema_source = DirSchemaSource(os.path.dirname(spec.origin))
+	return schema_source
+
+##
+#	@fn		_schema_path()
+#	@brief		Return path of #schema_source (or None), to choose the same
+#			one in worker processes
+def _schema_path():
+	source = _get_schema_source()
+	return source.path if source else None
+
+##
+#	@fn		_schema_rel(path)
+#	@brief		Return path relative to #dtschema (e.g. "schemas/types.yaml"),
+#			or None if path isn't under #dtschema
+def _schema_rel(path):
+	root = os.path.normpath(dtschema)
+	path = os.path.normpath(path)
+	if path.startswith(root + os.sep):
+		return path[len(root) + 1:].replace(os.sep, '/')
+	return None
+
+##
+#	@fn		_open(path)
+#	@brief		open() a YAML file for reading, files under #dtschema are read
+#			from #schema_source
+def _open(path):
+	rel = _schema_rel(path)
+	if rel is not None and _get_schema_source() is not None:
+		return schema_source.open(rel)
+	return open(path, 'r')
+
+##
+#	@fn		_exists(path)
+#	@brief		os.path.exists(), files under #dtschema are looked in #schema_source
+def _exists(path):
+	rel = _schema_rel(path)
+	if rel is not None and _get_schema_source() is not None:
+		return schema_source.exists(rel)
+	return os.path.exists(path)
+
+##
+#	@fn		_download(url, path)
+#	@brief		Download url in path, path is only written once complete
+def _download(url, path):
+	os.makedirs(os.path.dirname(path) or '.', exist_ok = True)
+	with urllib.request.urlopen(url, timeout = 60) as response:
+		with open(path + ".part", 'wb') as file_t:
+			shutil.copyfileobj(response, file_t)
+	os.replace(path + ".part", path)
+
+##
+#	@class		DirSchemaSource
+#	@brief		dtschema files read from a dir (e.g. ./download/dtschema or an
+#			installed dtschema python package)
+class DirSchemaSource:
+	def __init__(self, path):
+		##
+		#	@var	path
+		#		dtschema dir, containing schemas/ and meta-schemas/
+		self.path = path.rstrip('/')
+
+	##
+	#	@fn		files(self)
+	#	@brief		Yield path of every YAML file, relative to #path
+	def files(self):
+		for dirpath, dirnames, filenames in os.walk(self.path):
+			dirnames.sort()
+			for file in sorted(filenames):
+				if ".yaml" in file:
+					yield os.path.relpath(dirpath + '/' + file, self.path).replace(os.sep, '/')
+
+	def open(self, rel):
+		return open(self.path + '/' + rel, 'r')
+
+	def exists(self, rel):
+		return os.path.exists(self.path + '/' + rel)
+
+##
+#	@class		ZipSchemaSource
+#	@brief		dtschema files read directly from a zip archive (e.g. github
+#			dt-schema-main.zip or a dtschema wheel) without extracting it
+#	@details	Members are indexed once when the archive is opened, so several
+#			dt-schema versions can be kept side by side as zip files.
+class ZipSchemaSource:
+	def __init__(self, path):
+		##
+		#	@var	path
+		#		Path of the zip archive
+		self.path	= path
+		##
+		#	@var	_members
+		#		Dict where key are path relative to dtschema dir (e.g.
+		#		"schemas/types.yaml") and value the zip member name
+		self._members	= dict()
+		self._zip	= None
+		self._pid	= None
+
+		names = self._get_zip().namelist()
+		prefix = next((name[:name.find("dtschema/schemas/")] + "dtschema/"
+			       for name in names if "dtschema/schemas/" in name), None)
+		if prefix is None:
+			raise OSError("No dtschema/schemas/ found in %s" % path)
+
+		for name in names:
+			if name.startswith(prefix) and ".yaml" in name and not name.endswith('/'):
+				self._members.update({name[len(prefix):] : name})
+
+	##
+	#	@fn		files(self)
+	#	@brief		Yield path of every YAML file, relative to dtschema dir
+	def files(self):
+		return iter(sorted(self._members))
+
+	def open(self, rel):
+		try:
+			name = self._members[rel]
+		except KeyError:
+			raise FileNotFoundError(rel)
+		return io.StringIO(self._get_zip().read(name).decode('utf-8'))
+
+	def exists(self, rel):
+		return rel in self._members
+
+	##
+	#	@fn		_get_zip(self)
+	#	@brief		Return the opened ZipFile, opened again in child processes
+	#			as file offset can't be shared
+	def _get_zip(self):
+		if self._zip is None or self._pid != os.getpid():
+			self._zip = zipfile.ZipFile(self.path)
+			self._pid = os.getpid()
+		return self._zip
 
 ##
 #	@fn		_init_dtschema_list()
@@ -897,11 +3470,11 @@ class BindingProps:
 def _init_dtschema_list(verbose):
 	files_dict = dict()
 
-	for dirpath, _, filenames in os.walk(dtschema):
-		if dirpath != dtschema and not "meta-schemas" in dirpath:
-			for file in filenames:
-				if ".yaml" in file:
-					files_dict.update({file.split('.')[0] : dirpath + "/" + file})
+	source = _get_schema_source()
+	for rel in source.files() if source else ():
+		if '/' in rel and not rel.startswith("meta-schemas/"):
+			file = rel.rsplit('/',1)[-1]
+			files_dict.update({file.split('.')[0] : dtschema + "/" + rel})
 
 	types_dict = dict()
 
@@ -909,7 +3482,7 @@ def _init_dtschema_list(verbose):
 		if 'graph.yaml' in path:
 			continue
 		try:
-			file_t = open(path,'r')
+			file_t = _open(path)
 		except OSError:
 			if verbose:
 				print("[ERR ]:  Cannot open", path)
@@ -917,7 +3490,8 @@ def _init_dtschema_list(verbose):
 				print("	For more information, please use debug lvl 3")
 			continue
 
-		yaml_t = yaml.safe_load(file_t)
+		with file_t:
+			yaml_t = yaml.safe_load(file_t)
 
 		if 'properties' in yaml_t.keys():
 			props_t = yaml_t['properties']
@@ -0,0 +1,116 @@
+# This file is used to check sync_mirror() against a local HTTP server
+# It's not part of the docs
+import bindings
+import functools
+import http.server
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+##
+#	http.server serving a dir, without logging each request
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+	def log_message(self, format, *args):
+		pass
+
+	def do_GET(self):
+		# Serve the link of trap/index.html, so only sync_mirror() can reject it
+		if self.path.endswith("evil.yaml"):
+			self.send_response(200)
+			self.send_header("Content-Length", "6")
+			self.end_headers()
+			self.wfile.write(b"evil\n")
+			return
+		super().do_GET()
+
+##
+#	Write content in root/rel, with a mtime in the past so that each
+#	modification changes Last-Modified (second resolution)
+def write(root, rel, content, age = 100):
+	path = root + '/' + rel
+	os.makedirs(path.rsplit('/',1)[0], exist_ok = True)
+	with open(path, 'w') as file_t:
+		file_t.write(content)
+	mtime = time.time() - age
+	os.utime(path, (mtime, mtime))
+
+##
+#	Check that dest contains the same YAML files as root
+def same_tree(root, dest):
+	files = dict()
+	for base in (root, dest):
+		found = dict()
+		for dirpath, _, filenames in os.walk(base):
+			for file in filenames:
+				if file.endswith(".yaml"):
+					with open(dirpath + '/' + file, 'r') as file_t:
+						found.update({os.path.relpath(dirpath + '/' + file, base) : file_t.read()})
+		files.update({base : found})
+	return files[root] == files[dest]
+
+def check(name, condition, stats):
+	print("[%s]: %-28s %s" % ("INFO" if condition else "ERR ", name, stats))
+	return condition
+
+def main():
+	tmp = tempfile.mkdtemp()
+	root = tmp + "/www"
+	dest = tmp + "/mirror/bindings"
+	for rel in ("gpio/gpio-keys.yaml", "serial/serial.yaml", "serial/st,stm32-uart.yaml", "leds/leds-pwm.yaml"):
+		write(root, rel, "title: %s\n" % rel)
+	# A listing linking outside of the mirrored dir
+	write(root, "trap/index.html", '<a href="%2e%2e/%2e%2e/evil.yaml">evil</a>')
+
+	server = http.server.ThreadingHTTPServer(("127.0.0.1", 0),
+		functools.partial(QuietHandler, directory = root))
+	threading.Thread(target = server.serve_forever, daemon = True).start()
+	url = "http://127.0.0.1:%d/" % server.server_port
+
+	ok = True
+	try:
+		stats = bindings.sync_mirror(url, dest)
+		ok &= check("full sync", stats.downloaded == 4 and not stats.failed and same_tree(root, dest), stats)
+		ok &= check("path traversal rejected", not os.path.exists(tmp + "/evil.yaml")
+			    and not os.path.exists(tmp + "/mirror/evil.yaml"), stats)
+
+		stats = bindings.sync_mirror(url, dest)
+		ok &= check("resync (304)", stats.not_modified == 4 and not stats.downloaded, stats)
+
+		write(root, "serial/serial.yaml", "title: modified\n", age = 10)
+		stats = bindings.sync_mirror(url, dest)
+		ok &= check("modified file", stats.downloaded == 1 and same_tree(root, dest), stats)
+
+		os.remove(root + "/leds/leds-pwm.yaml")
+		stats = bindings.sync_mirror(url, dest)
+		ok &= check("removed file", not os.path.exists(dest + "/leds/leds-pwm.yaml") and same_tree(root, dest), stats)
+
+		# Fail on one file: mirror is kept as is, and next sync resumes
+		write(root, "gpio/gpio-keys.yaml", "title: modified\n", age = 5)
+		write(root, "serial/st,stm32-uart.yaml", "title: modified\n", age = 5)
+		request = bindings.MirrorSync._request
+		def failing(self, target, headers, retries = 2):
+			if target.endswith("stm32-uart.yaml"):
+				return 0, b"", dict()
+			return request(self, target, headers, retries)
+		bindings.MirrorSync._request = failing
+		try:
+			stats = bindings.sync_mirror(url, dest)
+		finally:
+			bindings.MirrorSync._request = request
+		ok &= check("failed sync", stats.failed == 1 and not same_tree(root, dest)
+			    and os.path.exists(dest + ".partial"), stats)
+
+		stats = bindings.sync_mirror(url, dest)
+		ok &= check("resumed sync", stats.resumed == 2 and stats.downloaded == 1 and not stats.failed
+			    and same_tree(root, dest) and not os.path.exists(dest + ".partial"), stats)
+	finally:
+		server.shutdown()
+		shutil.rmtree(tmp, ignore_errors = True)
+
+	return 0 if ok else 1
+
+if __name__ == "__main__":
+	sys.exit(main())